@@ -3,11 +3,11 @@
 import asyncio
 import json
 from pathlib import Path
-from dataclasses import dataclass, field
-from typing import Optional, Dict, List, Any
+from dataclasses import dataclass, field, replace
+from typing import Optional, Dict, List, Any, Tuple
 import logging
-import yaml
 
+from ..config import dump_yaml, load_yaml
 from ..core.workspace import load_workspace, build_bootstrap_context, AgentWorkspace
 from ..core.sessions import SessionStore, SessionEntry
 from ..core.transcripts import TranscriptStore, Message
@@ -51,12 +51,24 @@ class AgentConfig:
 
     @classmethod
     def from_yaml(cls, path: Path) -> "AgentConfig":
-        """Load config from YAML file."""
-        with open(path) as f:
-            data = yaml.safe_load(f) or {}
+        """Load config from YAML file, re-parsing only when the file changed."""
+        st = path.stat()
+        stamp = (st.st_mtime_ns, st.st_size)
+        cached = _CONFIG_CACHE.get(str(path))
+        if cached is None or cached[0] != stamp:
+            config = cls.from_dict(load_yaml(path), default_id=path.parent.name)
+            _CONFIG_CACHE[str(path)] = (stamp, config)
+        else:
+            config = cached[1]
+        # Hand out a copy so callers can't mutate the cached entry
+        return replace(config, tools=list(config.tools))
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], default_id: str) -> "AgentConfig":
+        """Build config from parsed agent.yaml data (default_id is the workspace name)."""
         return cls(
-            agent_id=data.get("id", path.parent.name),
-            name=data.get("name", path.parent.name),
+            agent_id=data.get("id", default_id),
+            name=data.get("name", default_id),
             description=data.get("description", ""),
             model=data.get("model"),
             thinking=data.get("thinking"),
@@ -67,6 +79,10 @@ class AgentConfig:
         )
 
 
+# Parsed agent.yaml files: path -> ((mtime_ns, size), config)
+_CONFIG_CACHE: Dict[str, Tuple[Tuple[int, int], AgentConfig]] = {}
+
+
 @dataclass
 class AgentHandle:
     """Handle to a running agent."""
@@ -360,11 +376,11 @@ Be thorough, use your tools, and report back clearly."""
         # Also update the YAML config on disk
         config_path = self.agents_dir / agent_id / "agent.yaml"
         if config_path.exists():
-            with open(config_path) as f:
-                data = yaml.safe_load(f) or {}
+            data = load_yaml(config_path)
             data["tools"] = tools
-            with open(config_path, "w") as f:
-                yaml.dump(data, f)
+            dump_yaml(config_path, data)
+            # A same-size rewrite can land within the mtime granularity
+            _CONFIG_CACHE.pop(str(config_path), None)
         return True
 
     async def chat(
@@ -542,15 +558,13 @@ Be thorough, use your tools, and report back clearly."""
             final_content += "\n\n[Max tool rounds reached. Stopping tool execution.]"
 
         # Save to transcript (user message + assistant response)
-        self.transcript_store.append_message(
-            session.session_id,
-            agent_id,
-            Message(role="user", content=message)
-        )
-        self.transcript_store.append_message(
+        self.transcript_store.append_messages(
             session.session_id,
             agent_id,
-            Message(role="assistant", content=final_content, thinking=response.thinking)
+            [
+                Message(role="user", content=message),
+                Message(role="assistant", content=final_content, thinking=response.thinking),
+            ]
         )
 
         # Update session tokens
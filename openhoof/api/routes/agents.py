@@ -67,7 +67,7 @@ async def create_agent(request: AgentCreate) -> AgentResponse:
     await ensure_workspace(workspace_dir)
     
     # Write agent.yaml
-    import yaml
+    from ...config import dump_yaml
     config_data = {
         "id": request.agent_id,
         "name": request.name,
@@ -79,7 +79,7 @@ async def create_agent(request: AgentCreate) -> AgentResponse:
             "interval": request.heartbeat_interval,
         },
     }
-    (workspace_dir / "agent.yaml").write_text(yaml.dump(config_data, default_flow_style=False))
+    dump_yaml(workspace_dir / "agent.yaml", config_data)
     
     # Write custom SOUL.md if provided
     if request.soul:
@@ -94,10 +94,8 @@ def agents_cmd(
                 config_path = agent_dir / "agent.yaml"
                 name = agent_dir.name
                 if config_path.exists():
-                    import yaml
-                    with open(config_path) as f:
-                        data = yaml.safe_load(f) or {}
-                        name = data.get("name", agent_dir.name)
+                    from ..config import load_yaml
+                    name = load_yaml(config_path).get("name", agent_dir.name)
                 
                 table.add_row(agent_dir.name, name, "[dim]stopped[/dim]")
         
@@ -121,7 +119,7 @@ def agents_cmd(
         (workspace_dir / "skills").mkdir()
         
         # Write agent.yaml
-        import yaml
+        from ..config import dump_yaml
         config_data = {
             "id": agent_id,
             "name": agent_name,
@@ -131,7 +129,7 @@ def agents_cmd(
                 "interval": 1800,
             },
         }
-        (workspace_dir / "agent.yaml").write_text(yaml.dump(config_data, default_flow_style=False))
+        dump_yaml(workspace_dir / "agent.yaml", config_data)
         
         # Write SOUL.md
         soul = f"""# {agent_name}
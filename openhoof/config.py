@@ -6,6 +6,21 @@ from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings
 import yaml
 
+# Prefer the libyaml C bindings when PyYAML was built with them
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+
+def load_yaml(path: Path) -> Dict[str, Any]:
+    """Parse a YAML mapping from disk (empty file -> empty dict)."""
+    with open(path, "rb") as f:
+        return yaml.load(f, Loader=YAML_LOADER) or {}
+
+
+def dump_yaml(path: Path, data: Dict[str, Any]) -> None:
+    """Write a mapping to disk as block-style UTF-8 YAML in one write."""
+    path.write_bytes(yaml.dump(data, Dumper=YAML_DUMPER, default_flow_style=False, encoding="utf-8"))
+
 
 class InferenceConfig(BaseModel):
     """Configuration for the inference backend."""
@@ -62,16 +77,12 @@ class Config(BaseModel):
         if not path.exists():
             return cls()
         
-        with open(path) as f:
-            data = yaml.safe_load(f) or {}
-        
-        return cls(**data)
+        return cls(**load_yaml(path))
     
     def save(self, path: Path) -> None:
         """Save configuration to YAML file."""
         path.parent.mkdir(parents=True, exist_ok=True)
-        with open(path, "w") as f:
-            yaml.dump(self.model_dump(), f, default_flow_style=False)
+        dump_yaml(path, self.model_dump())
 
 
 class Settings(BaseSettings):
@@ -2,12 +2,18 @@
 
 import asyncio
 from datetime import datetime
-from dataclasses import dataclass, field, asdict
-from typing import Callable, Awaitable, Dict, List, Any, Optional, Set
-from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Callable, Awaitable, Deque, Dict, Iterable, List, Any, Optional, Set
+from collections import defaultdict, deque
+from itertools import islice
 import logging
 import json
 
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 # Event types
@@ -35,7 +41,16 @@ class Event:
     event_id: Optional[str] = None
     
     def to_json(self) -> str:
-        return json.dumps(asdict(self))
+        # Serializing doesn't need asdict()'s deep copy of data
+        payload = {
+            "type": self.type,
+            "data": self.data,
+            "timestamp": self.timestamp,
+            "event_id": self.event_id,
+        }
+        if orjson is not None:
+            return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS).decode()
+        return json.dumps(payload)
 
 
 class WebSocketClient:
@@ -68,8 +83,15 @@ class EventBus:
     def __init__(self):
         self._subscribers: Dict[str, List[Callable[[Event], Awaitable[None]]]] = defaultdict(list)
         self._websockets: List[WebSocketClient] = []
-        self._event_history: List[Event] = []
         self._max_history = 1000
+        self._event_history: Deque[Event] = deque(maxlen=self._max_history)
+        self._lock = asyncio.Lock()
+    
+    def reset(self) -> None:
+        """Drop all subscribers, WebSocket clients and event history."""
+        self._subscribers.clear()
+        self._websockets.clear()
+        self._event_history.clear()
         self._lock = asyncio.Lock()
     
     def subscribe(self, event_type: str, callback: Callable[[Event], Awaitable[None]]) -> None:
@@ -89,11 +111,9 @@ class EventBus:
             event_id=f"{event_type}:{datetime.now().timestamp()}"
         )
         
-        # Store in history
+        # Store in history (the deque drops the oldest event when full)
         async with self._lock:
             self._event_history.append(event)
-            if len(self._event_history) > self._max_history:
-                self._event_history = self._event_history[-self._max_history:]
         
         # Notify local subscribers
         for callback in self._subscribers.get(event_type, []):
@@ -153,19 +173,21 @@ class EventBus:
     def get_recent_events(
         self,
         limit: int = 100,
-        event_types: Optional[List[str]] = None,
+        event_types: Optional[Iterable[str]] = None,
         agent_id: Optional[str] = None
     ) -> List[Event]:
         """Get recent events from history."""
-        events = self._event_history.copy()
+        types = frozenset(event_types) if event_types else None
         
-        if event_types:
-            events = [e for e in events if e.type in event_types]
-        
-        if agent_id:
-            events = [e for e in events if e.data.get("agent_id") == agent_id]
-        
-        return events[-limit:]
+        # Walk newest-first and stop once `limit` matches are found
+        matches = (
+            e for e in reversed(self._event_history)
+            if (types is None or e.type in types)
+            and (not agent_id or e.data.get("agent_id") == agent_id)
+        )
+        events = list(islice(matches, limit))
+        events.reverse()
+        return events
 
 
 # Global event bus instance
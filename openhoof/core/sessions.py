@@ -4,6 +4,7 @@ import json
 from pathlib import Path
 from datetime import datetime
 from dataclasses import dataclass, field, asdict
+from operator import attrgetter
 from typing import Optional, Dict, Any, List
 import uuid
 import logging
@@ -125,15 +126,13 @@ class SessionStore:
         """List sessions, optionally filtered."""
         self._ensure_loaded()
         
-        sessions = list(self._cache.values())
-        
-        if agent_id:
-            sessions = [s for s in sessions if s.agent_id == agent_id]
-        
-        if status:
-            sessions = [s for s in sessions if s.status == status]
+        # One pass over the cache, applying both filters per entry
+        sessions = [
+            s for s in self._cache.values()
+            if (not agent_id or s.agent_id == agent_id) and (not status or s.status == status)
+        ]
         
-        return sorted(sessions, key=lambda s: s.updated_at, reverse=True)
+        return sorted(sessions, key=attrgetter("updated_at"), reverse=True)
     
     def delete(self, session_key: str) -> bool:
         """Delete a session."""
@@ -146,6 +145,12 @@ class SessionStore:
             return True
         return False
     
+    def clear(self) -> None:
+        """Remove every session, in memory and on disk."""
+        self._cache.clear()
+        self._loaded = True
+        self.store_path.unlink(missing_ok=True)
+    
     def cleanup_old(self, max_age_hours: int = 24 * 7) -> int:
         """Clean up old completed sessions."""
         self._ensure_loaded()
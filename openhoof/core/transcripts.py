@@ -127,8 +127,17 @@ class TranscriptStore:
         message: Message
     ) -> Transcript:
         """Append a message to a transcript."""
+        return self.append_messages(session_id, agent_id, [message])
+    
+    def append_messages(
+        self,
+        session_id: str,
+        agent_id: str,
+        messages: List[Message]
+    ) -> Transcript:
+        """Append several messages with a single load and save."""
         transcript = self.get_or_create(session_id, agent_id)
-        transcript.messages.append(message)
+        transcript.messages.extend(messages)
         self.save(transcript)
         return transcript
     
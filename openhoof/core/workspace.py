@@ -4,7 +4,7 @@ import os
 from pathlib import Path
 from datetime import datetime, timedelta
 from dataclasses import dataclass, field
-from typing import Optional, List
+from typing import Optional, List, Dict, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
@@ -123,6 +123,30 @@ async def load_workspace(workspace_dir: Path) -> AgentWorkspace:
     )
 
 
+# Default templates per templates directory: path -> (per-file (mtime_ns, size), contents)
+_TEMPLATE_CACHE: Dict[str, Tuple[tuple, Dict[str, bytes]]] = {}
+
+
+def _template_bytes(templates_dir: Path) -> Dict[str, bytes]:
+    """Read the default workspace templates, re-reading only when one changed."""
+    stats = {}
+    for filename in DEFAULT_WORKSPACE_FILES:
+        try:
+            st = (templates_dir / filename).stat()
+        except FileNotFoundError:
+            continue
+        stats[filename] = (st.st_mtime_ns, st.st_size)
+    stamp = tuple(stats.items())
+
+    cached = _TEMPLATE_CACHE.get(str(templates_dir))
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    templates = {filename: (templates_dir / filename).read_bytes() for filename in stats}
+    _TEMPLATE_CACHE[str(templates_dir)] = (stamp, templates)
+    return templates
+
+
 async def ensure_workspace(
     workspace_dir: Path,
     templates_dir: Optional[Path] = None
@@ -138,12 +162,10 @@ async def ensure_workspace(
     
     # Write template files if they don't exist
     if templates_dir:
-        for filename in DEFAULT_WORKSPACE_FILES:
+        for filename, data in _template_bytes(templates_dir).items():
             dest = workspace_dir / filename
             if not dest.exists():
-                template = templates_dir / filename
-                if template.exists():
-                    dest.write_text(template.read_text())
+                dest.write_bytes(data)
     
     return workspace_dir
 
@@ -70,19 +70,28 @@ class Tool(ABC):
         pass
     
     def to_openai_schema(self) -> Dict[str, Any]:
-        """Convert to OpenAI tool schema format."""
-        return {
-            "type": "function",
-            "function": {
+        """Convert to OpenAI tool schema format.
+        
+        The outer dicts are fresh on every call, so callers may adjust them;
+        ``parameters`` is the tool's own schema and must not be mutated.
+        """
+        function = self.__dict__.get("_openai_function")
+        if function is None:
+            function = {
                 "name": self.name,
                 "description": self.description,
                 "parameters": self.parameters
             }
-        }
+            self._openai_function = function
+        return {"type": "function", "function": dict(function)}
     
     async def validate_params(self, params: Dict[str, Any]) -> Optional[str]:
         """Validate parameters. Returns error message if invalid."""
-        required = self.parameters.get("required", [])
+        # Required fields are read from the schema once per tool instance
+        required = self.__dict__.get("_required_params")
+        if required is None:
+            required = tuple(self.parameters.get("required", ()))
+            self._required_params = required
         for field in required:
             if field not in params:
                 return f"Missing required parameter: {field}"
@@ -1,11 +1,33 @@
 """Shell execution tool."""
 
 import asyncio
+import contextlib
 import os
+import signal
 from typing import Dict, Any
 
 from ..base import Tool, ToolResult, ToolContext
 
+# Substrings that get a command rejected outright
+DANGEROUS_PATTERNS = (
+    "rm -rf /",
+    "rm -rf ~",
+    "> /dev/",
+    "mkfs",
+    "dd if=",
+    ":(){:|:&};:",  # Fork bomb
+)
+
+
+def _kill(process: asyncio.subprocess.Process) -> None:
+    """Kill a timed-out command along with anything it spawned."""
+    # The command may have exited between the timeout and the kill
+    with contextlib.suppress(ProcessLookupError):
+        if hasattr(os, "killpg"):
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+
 
 class ExecTool(Tool):
     """Execute shell commands."""
@@ -47,16 +69,7 @@ Commands run with a timeout and limited permissions."""
         timeout = params.get("timeout", 30)
         
         # Security: basic command filtering
-        dangerous_patterns = [
-            "rm -rf /",
-            "rm -rf ~",
-            "> /dev/",
-            "mkfs",
-            "dd if=",
-            ":(){:|:&};:",  # Fork bomb
-        ]
-        
-        for pattern in dangerous_patterns:
+        for pattern in DANGEROUS_PATTERNS:
             if pattern in command:
                 return ToolResult(
                     success=False,
@@ -69,7 +82,9 @@ Commands run with a timeout and limited permissions."""
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
                 cwd=workdir,
-                env={**os.environ, "HOME": os.path.expanduser("~")}
+                env={**os.environ, "HOME": os.path.expanduser("~")},
+                # Own process group, so a timeout can kill the whole pipeline
+                start_new_session=hasattr(os, "killpg"),
             )
             
             try:
@@ -78,7 +93,9 @@ Commands run with a timeout and limited permissions."""
                     timeout=timeout
                 )
             except asyncio.TimeoutError:
-                process.kill()
+                _kill(process)
+                # Reap the child so its pipes close on this loop
+                await process.wait()
                 return ToolResult(
                     success=False,
                     error=f"Command timed out after {timeout}s"
@@ -70,17 +70,16 @@ The content will be appended for daily files, or replaced for other files."""
         
         try:
             if append:
-                # Append mode
-                if not full_path.exists() and is_daily:
-                    # Create with header
-                    date_str = file_path.replace("memory/", "").replace(".md", "")
-                    header = f"# Memory Log: {date_str}\n\n"
-                    full_path.write_text(header)
-                
-                # Append with timestamp
-                timestamp = datetime.now().strftime("%H:%M")
+                # Append mode; a new daily file gets its header in the same write
                 with open(full_path, "a") as f:
-                    f.write(f"\n**{timestamp}:** {content}\n")
+                    header = ""
+                    if is_daily and f.tell() == 0:
+                        date_str = file_path.replace("memory/", "").replace(".md", "")
+                        header = f"# Memory Log: {date_str}\n\n"
+                    
+                    # Append with timestamp
+                    timestamp = datetime.now().strftime("%H:%M")
+                    f.write(f"{header}\n**{timestamp}:** {content}\n")
             else:
                 # Replace mode
                 full_path.write_text(content)
@@ -1,22 +1,183 @@
 """Shared knowledge tools for cross-agent data sharing."""
 
 import json
+import os
+import re
+import tempfile
+from collections import OrderedDict
+from itertools import islice
 from pathlib import Path
-from datetime import datetime
-from typing import Dict, Any, List, Optional
+from datetime import datetime, timezone
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 
 from ..base import Tool, ToolResult, ToolContext
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+_OPEN_FLAGS = os.O_WRONLY | os.O_CREAT | getattr(os, "O_CLOEXEC", 0) | getattr(os, "O_NOFOLLOW", 0)
+_APPEND_FLAGS = _OPEN_FLAGS | os.O_APPEND
+
+# Knowledge keys become file names: refuse only what could leave the knowledge
+# directory or hide a file (separators, NUL, a leading dot, which covers "..")
+_UNSAFE_KEY_RE = re.compile(r"[/\\\x00]")
+
+
+def _valid_key(key: str) -> bool:
+    """Check a knowledge key; plain alphanumeric keys skip the regex."""
+    if key.isascii() and key.isalnum():
+        return True
+    return bool(key) and not key.startswith(".") and _UNSAFE_KEY_RE.search(key) is None
+
+
+def _ts() -> str:
+    """Timezone-aware timestamp so entries from different agents order correctly."""
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+
+
+def _write_all(fd: int, *chunks: bytes) -> None:
+    """Write every chunk to fd, using one writev call where available."""
+    written = os.writev(fd, chunks) if hasattr(os, "writev") else 0
+    for chunk in chunks:
+        if written >= len(chunk):
+            written -= len(chunk)
+            continue
+        # Short write: finish this chunk (and the rest) one write at a time
+        view = memoryview(chunk)[written:]
+        written = 0
+        while view:
+            view = view[os.write(fd, view):]
+
+
+def _retry_in_missing_dir(path: Path, opener):
+    """Run opener(), recreating path's directory once if it has gone missing."""
+    try:
+        return opener()
+    except FileNotFoundError:
+        # The shared dir was removed after _get_shared_dir cached it
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return opener()
+
+
+def _raw_write(path: Path, *chunks: bytes) -> None:
+    """Replace a file's bytes via a temp file, so readers never see a partial write."""
+    fd, tmp_name = _retry_in_missing_dir(
+        path, lambda: tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}-", suffix=".tmp")
+    )
+    try:
+        try:
+            _write_all(fd, *chunks)
+        finally:
+            os.close(fd)
+        os.chmod(tmp_name, 0o644)  # mkstemp creates 0600
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+
+def _raw_append(path: Path, data: bytes) -> None:
+    """Append bytes to a file with a single write under an exclusive lock."""
+    fd = _retry_in_missing_dir(path, lambda: os.open(path, _APPEND_FLAGS, 0o644))
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        _write_all(fd, data)
+    finally:
+        os.close(fd)
+
+
+# Resolved shared dirs keyed by workspace path, so the mkdirs happen once
+_SHARED_DIR_CACHE: Dict[str, Path] = {}
+
 
 def _get_shared_dir(context: ToolContext) -> Path:
     """Get the shared knowledge directory (sibling to agent workspaces)."""
+    key = str(context.workspace_dir)
+    shared_dir = _SHARED_DIR_CACHE.get(key)
+    if shared_dir is not None:
+        return shared_dir
+
     workspace = Path(context.workspace_dir)
     # Go up from agent workspace to the agents root, then to shared
     shared_dir = workspace.parent.parent / "data" / "shared"
-    shared_dir.mkdir(parents=True, exist_ok=True)
+    (shared_dir / "knowledge").mkdir(parents=True, exist_ok=True)
+    _SHARED_DIR_CACHE[key] = shared_dir
     return shared_dir
 
 
+# Per-process copy of shared knowledge entries: file path -> (version, mtime_ns, content),
+# kept in least-recently-read order and capped so large stores don't pin every entry
+_READ_CACHE: "OrderedDict[str, Tuple[int, int, str]]" = OrderedDict()
+_READ_CACHE_MAX = 256
+
+# Parsed versions.json per shared dir: path -> ((mtime_ns, size) of versions.json, table)
+_VERSIONS_CACHE: Dict[str, Tuple[Tuple[int, int], Dict[str, Dict[str, int]]]] = {}
+
+
+def _load_versions(shared_dir: Path) -> Dict[str, Dict[str, int]]:
+    """Load the key -> {version, mtime_ns} table, re-parsing only when it changed."""
+    path = shared_dir / "versions.json"
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return {}
+
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _VERSIONS_CACHE.get(str(path))
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    try:
+        versions = json.loads(path.read_text())
+    except (json.JSONDecodeError, OSError):
+        versions = {}
+    _VERSIONS_CACHE[str(path)] = (stamp, versions)
+    return versions
+
+
+# Knowledge keys per directory: path -> (dir mtime_ns, sorted keys)
+_KEYS_CACHE: Dict[str, Tuple[int, List[str]]] = {}
+
+
+def _list_keys(knowledge_dir: Path) -> List[str]:
+    """List knowledge keys, rescanning the directory only when its mtime changes."""
+    try:
+        mtime_ns = knowledge_dir.stat().st_mtime_ns
+    except FileNotFoundError:
+        return []
+
+    cached = _KEYS_CACHE.get(str(knowledge_dir))
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+
+    keys = sorted(name[:-3] for name in os.listdir(knowledge_dir) if name.endswith(".md"))
+    _KEYS_CACHE[str(knowledge_dir)] = (mtime_ns, keys)
+    return keys
+
+
+def _bump_version(shared_dir: Path, key: str, file_path: Path) -> int:
+    """Record a new version for a knowledge key after it has been written."""
+    path = shared_dir / "versions.json"
+    # Serialize the read-modify-replace so concurrent writers don't drop each other's bumps
+    lock_fd = os.open(shared_dir / "versions.lock", _OPEN_FLAGS, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX)
+        versions = dict(_load_versions(shared_dir))
+        version = versions.get(key, {}).get("version", 0) + 1
+        versions[key] = {"version": version, "mtime_ns": file_path.stat().st_mtime_ns}
+
+        _raw_write(path, json.dumps(versions).encode())
+        st = path.stat()
+        _VERSIONS_CACHE[str(path)] = ((st.st_mtime_ns, st.st_size), versions)
+    finally:
+        os.close(lock_fd)
+    return version
+
+
 class SharedWriteTool(Tool):
     """Write to the shared cross-agent knowledge store."""
 
@@ -54,15 +215,19 @@ Files are stored in a central shared directory."""
         key = params["key"]
         content = params["content"]
         tags = params.get("tags", [])
+        if not _valid_key(key):
+            return ToolResult(success=False, error=f"Invalid key '{key}'")
 
         shared_dir = _get_shared_dir(context)
-        knowledge_dir = shared_dir / "knowledge"
-        knowledge_dir.mkdir(parents=True, exist_ok=True)
 
         # Write the content file
-        file_path = knowledge_dir / f"{key}.md"
-        header = f"---\nauthor: {context.agent_id}\ncreated: {datetime.now().isoformat()}\ntags: {json.dumps(tags)}\n---\n\n"
-        file_path.write_text(header + content)
+        file_path = shared_dir / "knowledge" / f"{key}.md"
+        header = f"---\nauthor: {context.agent_id}\ncreated: {_ts()}\ntags: {json.dumps(tags)}\n---\n\n"
+        # Header and body go out as separate buffers; no header + content copy
+        _raw_write(file_path, header.encode(), content.encode())
+        _bump_version(shared_dir, key, file_path)
+        # Directory mtime can lag a same-tick create, so don't rely on it here
+        _KEYS_CACHE.pop(str(file_path.parent), None)
 
         # Also append to the index
         index_path = shared_dir / "index.jsonl"
@@ -70,12 +235,11 @@ Files are stored in a central shared directory."""
             "key": key,
             "agent_id": context.agent_id,
             "session_key": context.session_key,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": _ts(),
             "tags": tags,
             "size": len(content),
         }
-        with open(index_path, "a") as f:
-            f.write(json.dumps(entry) + "\n")
+        _raw_append(index_path, (json.dumps(entry) + "\n").encode())
 
         return ToolResult(
             success=True,
@@ -107,21 +271,42 @@ Use this to:
 
     async def execute(self, params: Dict[str, Any], context: ToolContext) -> ToolResult:
         key = params["key"]
+        if not _valid_key(key):
+            return ToolResult(success=False, error=f"Invalid key '{key}'")
         shared_dir = _get_shared_dir(context)
         file_path = shared_dir / "knowledge" / f"{key}.md"
 
-        if not file_path.exists():
-            # List available keys
-            knowledge_dir = shared_dir / "knowledge"
-            available = []
-            if knowledge_dir.exists():
-                available = [f.stem for f in knowledge_dir.glob("*.md")]
+        # Serve from memory when nobody has written the key since we last read it;
+        # comparing the file's own mtime also catches edits made outside shared_write
+        try:
+            mtime_ns = file_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            mtime_ns = None
+        current = _load_versions(shared_dir).get(key)
+        cached = _READ_CACHE.get(str(file_path))
+        if cached is not None:
+            if current is not None and (cached[0], cached[1]) == (current["version"], mtime_ns):
+                _READ_CACHE.move_to_end(str(file_path))
+                content = cached[2]
+                return ToolResult(
+                    success=True,
+                    data={"key": key, "content": content},
+                    message=f"Read shared knowledge '{key}' ({len(content)} chars)"
+                )
+            del _READ_CACHE[str(file_path)]
+
+        if mtime_ns is None:
+            available = _list_keys(shared_dir / "knowledge")
             return ToolResult(
                 success=False,
                 error=f"Key '{key}' not found. Available keys: {available[:20]}"
             )
 
         content = file_path.read_text()
+        if current is not None:
+            _READ_CACHE[str(file_path)] = (current["version"], mtime_ns, content)
+            if len(_READ_CACHE) > _READ_CACHE_MAX:
+                _READ_CACHE.popitem(last=False)
         return ToolResult(
             success=True,
             data={"key": key, "content": content},
@@ -171,7 +356,7 @@ All agents can search this log."""
         findings_path = shared_dir / "findings.jsonl"
 
         entry = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": _ts(),
             "agent_id": context.agent_id,
             "session_key": context.session_key,
             "category": category,
@@ -179,8 +364,7 @@ All agents can search this log."""
             "finding": finding,
         }
 
-        with open(findings_path, "a") as f:
-            f.write(json.dumps(entry) + "\n")
+        _raw_append(findings_path, (json.dumps(entry) + "\n").encode())
 
         return ToolResult(
             success=True,
@@ -226,50 +410,62 @@ Use this to find what other agents have discovered or stored."""
         limit = params.get("limit", 10)
 
         shared_dir = _get_shared_dir(context)
-        results: List[Dict[str, Any]] = []
+        # Stop scanning as soon as we have enough matches
+        results: List[Dict[str, Any]] = list(islice(
+            self._scan(shared_dir, query, category_filter, agent_filter), limit
+        ))
 
+        return ToolResult(
+            success=True,
+            data={"results": results, "total": len(results)},
+            message=f"Found {len(results)} results for '{query}'"
+        )
+
+    def _scan(
+        self,
+        shared_dir: Path,
+        query: str,
+        category_filter: Optional[str],
+        agent_filter: Optional[str],
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield matches lazily: knowledge entries first, then findings."""
         # Search knowledge files
         knowledge_dir = shared_dir / "knowledge"
         if knowledge_dir.exists():
             for f in knowledge_dir.glob("*.md"):
-                if query in f.stem.lower() or query in f.read_text().lower():
-                    results.append({
+                text = f.read_text()
+                if query in f.stem.lower() or query in text.lower():
+                    yield {
                         "type": "knowledge",
                         "key": f.stem,
-                        "preview": f.read_text()[:200]
-                    })
+                        "preview": text[:200]
+                    }
 
         # Search findings log
         findings_path = shared_dir / "findings.jsonl"
         if findings_path.exists():
-            for line in findings_path.read_text().strip().split("\n"):
-                if not line:
-                    continue
-                try:
-                    entry = json.loads(line)
+            with open(findings_path) as fh:
+                for line in fh:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
                     if category_filter and entry.get("category") != category_filter:
                         continue
                     if agent_filter and entry.get("agent_id") != agent_filter:
                         continue
                     if query in entry.get("finding", "").lower() or query in entry.get("category", "").lower():
-                        results.append({
+                        yield {
                             "type": "finding",
                             "timestamp": entry["timestamp"],
                             "agent_id": entry["agent_id"],
                             "category": entry.get("category"),
                             "severity": entry.get("severity"),
                             "finding": entry["finding"][:200]
-                        })
-                except json.JSONDecodeError:
-                    continue
-
-        results = results[:limit]
-
-        return ToolResult(
-            success=True,
-            data={"results": results, "total": len(results)},
-            message=f"Found {len(results)} results for '{query}'"
-        )
+                        }
 
 
 class ListToolsTool(Tool):
@@ -293,15 +489,7 @@ Use this to understand what capabilities you have."""
         if not self._registry:
             return ToolResult(success=False, error="Tool registry not available")
 
-        tools = self._registry.list_tools()
-        tool_list = []
-        for t in tools:
-            tool_list.append({
-                "name": t.name,
-                "description": t.description.strip()[:200],
-                "requires_approval": t.requires_approval,
-                "parameters": list(t.parameters.get("properties", {}).keys())
-            })
+        tool_list = self._registry.render_tool_list()
 
         return ToolResult(
             success=True,
@@ -1,6 +1,6 @@
 """Tool registry for managing available tools."""
 
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple, FrozenSet
 import logging
 
 from .base import Tool, ToolResult, ToolContext
@@ -13,21 +13,48 @@ class ToolRegistry:
     
     def __init__(self):
         self._tools: Dict[str, Tool] = {}
+        # Truncated descriptions for render_tool_list, kept in step with _tools
+        self._short_descriptions: Dict[str, str] = {}
+        # Bumped on every register/unregister; keys the derived caches below
+        self._revision = 0
+        self._list_cache: Optional[Tuple[int, List[Dict[str, Any]]]] = None
+        self._schema_cache: Dict[Tuple[int, Optional[FrozenSet[str]]], Tuple[Tool, ...]] = {}
     
     def register(self, tool: Tool) -> None:
         """Register a tool."""
         if tool.name in self._tools:
             logger.warning(f"Overwriting existing tool: {tool.name}")
         self._tools[tool.name] = tool
+        self._short_descriptions[tool.name] = self._shorten(tool.description)
+        self._revision += 1
         logger.info(f"Registered tool: {tool.name}")
     
+    @staticmethod
+    def _shorten(description: str) -> str:
+        """Trim a tool description to the length shown in tool listings."""
+        return description.strip()[:200]
+    
     def unregister(self, name: str) -> bool:
         """Unregister a tool."""
         if name in self._tools:
             del self._tools[name]
+            del self._short_descriptions[name]
+            self._revision += 1
             return True
         return False
     
+    def snapshot(self) -> Dict[str, Tool]:
+        """Capture the current set of registered tools."""
+        return dict(self._tools)
+    
+    def restore(self, snapshot: Dict[str, Tool]) -> None:
+        """Reset the registry to a previously captured snapshot."""
+        self._tools = dict(snapshot)
+        self._short_descriptions = {
+            name: self._shorten(tool.description) for name, tool in self._tools.items()
+        }
+        self._revision += 1
+    
     def get(self, name: str) -> Optional[Tool]:
         """Get a tool by name."""
         return self._tools.get(name)
@@ -36,11 +63,40 @@ class ToolRegistry:
         """List all registered tools."""
         return list(self._tools.values())
     
+    def render_tool_list(self) -> List[Dict[str, Any]]:
+        """Get a summary of all registered tools, cached per registry revision."""
+        if self._list_cache is not None and self._list_cache[0] == self._revision:
+            return self._list_cache[1]
+        
+        tool_list = [
+            {
+                "name": t.name,
+                "description": self._short_descriptions[t.name],
+                "requires_approval": t.requires_approval,
+                "parameters": list(t.parameters.get("properties", {}).keys())
+            }
+            for t in self._tools.values()
+        ]
+        self._list_cache = (self._revision, tool_list)
+        return tool_list
+    
     def get_openai_schemas(self, tool_names: Optional[List[str]] = None) -> List[Dict[str, Any]]:
-        """Get OpenAI tool schemas for specified tools (or all if not specified)."""
-        tools = self._tools.values()
-        if tool_names:
-            tools = [t for t in tools if t.name in tool_names]
+        """Get OpenAI tool schemas for specified tools (or all if not specified).
+        
+        The tool selection is cached per revision; the schema dicts are built
+        fresh each call so callers can adjust them without touching the cache.
+        """
+        names = frozenset(tool_names) if tool_names else None
+        key = (self._revision, names)
+        tools = self._schema_cache.get(key)
+        if tools is None:
+            tools = tuple(
+                t for t in self._tools.values() if names is None or t.name in names
+            )
+            # Entries from older revisions can never be hit again
+            if any(k[0] != self._revision for k in self._schema_cache):
+                self._schema_cache.clear()
+            self._schema_cache[key] = tools
         return [t.to_openai_schema() for t in tools]
     
     async def execute(
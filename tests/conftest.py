@@ -1,11 +1,13 @@
 """Pytest fixtures for Atmosphere Agents tests."""
 
+import os
 import pytest
+import shutil
 import tempfile
 from pathlib import Path
-import asyncio
+from datetime import datetime
 
-from openhoof.config import Config, Settings
+from openhoof.config import Config
 from openhoof.core.workspace import ensure_workspace
 from openhoof.core.sessions import SessionStore
 from openhoof.core.transcripts import TranscriptStore
@@ -14,66 +16,152 @@ from openhoof.tools import ToolRegistry
 from openhoof.tools.builtin import register_builtin_tools
 
 
-@pytest.fixture
-def temp_dir():
-    """Create a temporary directory for tests."""
-    with tempfile.TemporaryDirectory() as tmpdir:
-        yield Path(tmpdir)
+def pytest_configure(config):
+    """Keep test files on tmpfs when available.
 
+    Fixtures write many tiny files and never need them to survive a reboot.
+    An explicit --basetemp wins, and xdist workers inherit the controller's.
+    """
+    if config.option.basetemp or hasattr(config, "workerinput"):
+        return
+    if os.access("/dev/shm", os.W_OK):
+        config.option.basetemp = tempfile.mkdtemp(prefix="openhoof-pytest-", dir="/dev/shm")
+        config._openhoof_shm_basetemp = config.option.basetemp
 
-@pytest.fixture
-def config():
-    """Create test configuration."""
-    return Config()
 
+def pytest_unconfigure(config):
+    """Free the tmpfs base temp dir created in pytest_configure."""
+    basetemp = getattr(config, "_openhoof_shm_basetemp", None)
+    if basetemp:
+        shutil.rmtree(basetemp, ignore_errors=True)
 
-@pytest.fixture
-async def workspace_dir(temp_dir):
-    """Create a test workspace."""
-    workspace = temp_dir / "test-agent"
-    await ensure_workspace(workspace)
-    
-    # Write test SOUL.md
-    (workspace / "SOUL.md").write_text("""# Test Agent
+
+TEST_SOUL = """# Test Agent
 
 You are a test agent.
 
 ## Identity
 A helpful test agent.
-""")
-    
-    # Write test AGENTS.md
-    (workspace / "AGENTS.md").write_text("""# Workspace
+"""
+
+TEST_AGENTS = """# Workspace
 
 ## Behavior
 - Be helpful
 - Run tests
-""")
+"""
+
+
+@pytest.fixture
+def temp_dir(tmp_path):
+    """Per-test temporary directory (pytest prunes old runs in bulk)."""
+    return tmp_path
+
+
+@pytest.fixture
+def agents_dir(temp_dir):
+    """Create an empty agents directory; data lives alongside it."""
+    path = temp_dir / "agents"
+    path.mkdir()
+    return path
+
+
+@pytest.fixture
+def frozen_time(monkeypatch):
+    """Freeze the session/transcript/heartbeat clock; advance it with frozen_time[0] += seconds."""
+    clock = [1_700_000_000.0]
+    
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.fromtimestamp(clock[0], tz)
+    
+    monkeypatch.setattr("openhoof.core.sessions.datetime", FrozenDatetime)
+    monkeypatch.setattr("openhoof.core.transcripts.datetime", FrozenDatetime)
+    monkeypatch.setattr("openhoof.agents.heartbeat.datetime", FrozenDatetime)
+    return clock
+
+
+@pytest.fixture
+def config():
+    """Create test configuration."""
+    return Config()
+
+
+@pytest.fixture(scope="session")
+async def _workspace_template(tmp_path_factory):
+    """Provision the test workspace once; tests get their own copy."""
+    workspace = tmp_path_factory.mktemp("template") / "test-agent"
+    await ensure_workspace(workspace)
+    
+    # Write test SOUL.md and AGENTS.md
+    (workspace / "SOUL.md").write_text(TEST_SOUL)
+    (workspace / "AGENTS.md").write_text(TEST_AGENTS)
     
     return workspace
 
 
 @pytest.fixture
-def session_store(temp_dir):
-    """Create a test session store."""
-    return SessionStore(temp_dir / "sessions.json")
+def workspace_dir(temp_dir, _workspace_template):
+    """Create a test workspace."""
+    return Path(shutil.copytree(_workspace_template, temp_dir / "test-agent"))
+
+
+@pytest.fixture(scope="module")
+def _shared_session_store(tmp_path_factory):
+    """Session store reused by every test in a module."""
+    return SessionStore(tmp_path_factory.mktemp("sessions") / "sessions.json")
 
 
 @pytest.fixture
-def transcript_store(temp_dir):
-    """Create a test transcript store."""
-    return TranscriptStore(temp_dir / "transcripts")
+def session_store(_shared_session_store):
+    """Provide an empty session store, reset after each test."""
+    yield _shared_session_store
+    _shared_session_store.clear()
+
+
+@pytest.fixture(scope="module")
+def _shared_transcript_store(tmp_path_factory):
+    """Transcript store reused by every test in a module."""
+    return TranscriptStore(tmp_path_factory.mktemp("transcripts"))
 
 
 @pytest.fixture
-def event_bus():
-    """Create a test event bus."""
+def transcript_store(_shared_transcript_store):
+    """Provide an empty transcript store, reset after each test."""
+    yield _shared_transcript_store
+    for path in _shared_transcript_store.transcripts_dir.glob("*.json"):
+        path.unlink()
+
+
+@pytest.fixture(scope="session")
+def _shared_event_bus():
+    """Event bus reused across the whole session."""
     return EventBus()
 
 
 @pytest.fixture
-def tool_registry():
-    """Create a tool registry with built-in tools."""
+def event_bus(_shared_event_bus):
+    """Provide an empty event bus, reset after each test."""
+    yield _shared_event_bus
+    _shared_event_bus.reset()
+
+
+@pytest.fixture(scope="session")
+def builtin_registry():
+    """Build the built-in tool registry once per session (read-only tests)."""
     registry = ToolRegistry()
     register_builtin_tools(registry)
     return registry
+
+
+@pytest.fixture
+def tool_registry(builtin_registry):
+    """Provide the built-in tool registry, reset after tests that mutate it."""
+    snapshot = builtin_registry.snapshot()
+    revision = builtin_registry._revision
+    yield builtin_registry
+    # Restoring bumps the revision, so skip it when nothing changed and
+    # keep the registry's schema/list caches warm for the next test
+    if builtin_registry._revision != revision:
+        builtin_registry.restore(snapshot)
@@ -0,0 +1,236 @@
+"""Tests for agent configuration parsing."""
+
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from openhoof.agents import AgentConfig, AgentManager
+from openhoof.config import load_yaml
+from openhoof.inference import ChatResponse
+from openhoof.tools import ToolRegistry
+
+
+class _StubInference:
+    """Inference stand-in replaying canned responses; cheaper than an AsyncMock."""
+
+    def __init__(self, *responses: ChatResponse):
+        self.calls: list = []
+        self._responses = list(responses)
+
+    async def chat_completion(self, *args, **kwargs):
+        self.calls.append(kwargs)
+        if not self._responses:
+            raise AssertionError("inference should not be called")
+        return self._responses.pop(0)
+
+
+PARSE_CASES = [
+    (
+        "minimal",
+        {"name": "Trader"},
+        lambda c: (
+            c.agent_id == "minimal"
+            and c.name == "Trader"
+            and c.model is None
+            and c.heartbeat_enabled is True
+            and c.heartbeat_interval == 1800
+            and c.tools == []
+            and c.max_tool_rounds == 5
+        ),
+    ),
+    (
+        "explicit-id",
+        {"id": "trader", "name": "Trader", "description": "Watches prices"},
+        lambda c: c.agent_id == "trader" and c.description == "Watches prices",
+    ),
+    (
+        "model-and-thinking",
+        {"name": "Thinker", "model": "qwen3-8b", "thinking": "high"},
+        lambda c: c.model == "qwen3-8b" and c.thinking == "high",
+    ),
+    (
+        "heartbeat",
+        {"name": "Pulse", "heartbeat": {"enabled": False, "interval": 60}},
+        lambda c: c.heartbeat_enabled is False and c.heartbeat_interval == 60,
+    ),
+    (
+        "tools",
+        {"name": "Tooled", "tools": ["exec", "notify"], "max_tool_rounds": 2},
+        lambda c: c.tools == ["exec", "notify"] and c.max_tool_rounds == 2,
+    ),
+    (
+        "empty",
+        None,
+        lambda c: c.agent_id == "empty" and c.name == "empty",
+    ),
+]
+
+
+@pytest.mark.parametrize("name,doc,predicate", PARSE_CASES, ids=[c[0] for c in PARSE_CASES])
+def test_parse_agent_config(name, doc, predicate):
+    """Test parsing agent.yaml variants."""
+    config = AgentConfig.from_dict(doc or {}, default_id=name)
+
+    assert predicate(config), config
+
+
+@pytest.mark.parametrize(
+    "text,doc",
+    [
+        (b"name: Thinker\nmodel: qwen3-8b\nthinking: high\n", PARSE_CASES[2][1]),
+        (b"heartbeat:\n  enabled: false\n  interval: 60\nname: Pulse\n", PARSE_CASES[3][1]),
+        (b"", {}),
+    ],
+    ids=["full", "nested", "empty-file"],
+)
+def test_from_yaml_roundtrip(tmp_path, text, doc):
+    """Test loading agent.yaml from disk matches parsing the same data."""
+    workspace = tmp_path / "trader"
+    workspace.mkdir()
+    path = workspace / "agent.yaml"
+    path.write_bytes(text)
+
+    assert AgentConfig.from_yaml(path) == AgentConfig.from_dict(doc, default_id="trader")
+
+
+def test_from_yaml_reparses_after_change(tmp_path):
+    """Test cached configs are isolated copies and follow file changes."""
+    workspace = tmp_path / "trader"
+    workspace.mkdir()
+    path = workspace / "agent.yaml"
+    path.write_bytes(b"name: Trader\ntools:\n- exec\n")
+
+    first = AgentConfig.from_yaml(path)
+    first.tools.append("notify")
+    assert AgentConfig.from_yaml(path).tools == ["exec"]
+
+    path.write_bytes(b"name: Trader\ntools:\n- exec\n- shared_read\n")
+    assert AgentConfig.from_yaml(path).tools == ["exec", "shared_read"]
+
+
+@pytest.fixture(scope="session")
+def stub_inference():
+    """Shared inference stand-in; tests here never call it."""
+    return _StubInference()
+
+
+@pytest.fixture
+def inference_factory():
+    """Build a stub inference that answers with the given contents in order."""
+    def make(*contents: str) -> _StubInference:
+        return _StubInference(*(ChatResponse(content=c, model="stub") for c in contents))
+    return make
+
+
+@pytest.fixture
+def manager_registry(builtin_registry):
+    """Fresh registry sharing the session's built-in tool instances."""
+    registry = ToolRegistry()
+    registry.restore(builtin_registry.snapshot())
+    return registry
+
+
+@pytest.fixture
+def setup_dirs(agents_dir):
+    """Return the (agents_dir, data_dir) pair an AgentManager needs."""
+    return agents_dir, agents_dir.parent / "data"
+
+
+def _create_agents(agents_dir, specs):
+    """Write an agent.yaml per spec dict (keyed by its "id") in one pass.
+
+    Specs are flat, so they are written as JSON, which YAML loads as-is.
+    """
+    for spec in specs:
+        workspace = agents_dir / spec["id"]
+        workspace.mkdir(exist_ok=True)
+        (workspace / "agent.yaml").write_text(json.dumps(spec))
+
+
+async def test_update_agent_tools_rewrites_yaml(setup_dirs, stub_inference, manager_registry):
+    """Test updating tools rewrites agent.yaml and keeps other fields."""
+    agents_dir, data_dir = setup_dirs
+    _create_agents(agents_dir, [{"id": "trader", "name": "Trader", "tools": ["exec"]}])
+    workspace = agents_dir / "trader"
+
+    manager = AgentManager(agents_dir, data_dir, inference=stub_inference, tool_registry=manager_registry)
+    assert await manager.update_agent_tools("trader", ["notify", "shared_read"])
+    assert stub_inference.calls == []
+
+    assert load_yaml(workspace / "agent.yaml") == {
+        "id": "trader",
+        "name": "Trader",
+        "tools": ["notify", "shared_read"],
+    }
+
+
+async def test_update_agent_tools_drops_cached_config(setup_dirs, stub_inference, manager_registry):
+    """Test a same-size rewrite within the mtime granularity still reaches from_yaml."""
+    agents_dir, data_dir = setup_dirs
+    _create_agents(agents_dir, [{"id": "trader", "name": "Trader"}])
+    path = agents_dir / "trader" / "agent.yaml"
+
+    manager = AgentManager(agents_dir, data_dir, inference=stub_inference, tool_registry=manager_registry)
+    await manager.update_agent_tools("trader", ["exec"])
+    st = path.stat()
+    assert AgentConfig.from_yaml(path).tools == ["exec"]
+
+    await manager.update_agent_tools("trader", ["ping"])
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert AgentConfig.from_yaml(path).tools == ["ping"]
+
+
+async def test_list_agents(setup_dirs, stub_inference, manager_registry):
+    """Test listing agents reports each agent.yaml and bare directories."""
+    agents_dir, data_dir = setup_dirs
+    _create_agents(agents_dir, [
+        {"id": "trader", "name": "Trader", "description": "Watches prices", "model": "qwen3-8b"},
+        {"id": "scout", "name": "Scout", "tools": ["notify"]},
+    ])
+    (agents_dir / "bare").mkdir()
+
+    manager = AgentManager(agents_dir, data_dir, inference=stub_inference, tool_registry=manager_registry)
+    agents = {a["agent_id"]: a for a in await manager.list_agents()}
+
+    assert set(agents) == {"trader", "scout", "bare"}
+    assert agents["trader"]["description"] == "Watches prices"
+    assert agents["trader"]["model"] == "qwen3-8b"
+    assert agents["scout"]["tools"] == ["notify"]
+    assert agents["bare"]["name"] == "bare"
+    assert all(a["status"] == "stopped" for a in agents.values())
+
+
+async def test_list_agents_running_status(setup_dirs, stub_inference, manager_registry):
+    """Test listed status follows the manager's running-agent table."""
+    agents_dir, data_dir = setup_dirs
+    _create_agents(agents_dir, [{"id": "trader", "name": "Trader"}, {"id": "scout", "name": "Scout"}])
+
+    manager = AgentManager(agents_dir, data_dir, inference=stub_inference, tool_registry=manager_registry)
+    # Only membership is checked, so a bare namespace stands in for a handle
+    manager._agents["trader"] = SimpleNamespace()
+    status = {a["agent_id"]: a["status"] for a in await manager.list_agents()}
+
+    assert status == {"trader": "running", "scout": "stopped"}
+
+
+async def test_chat_records_transcript(setup_dirs, inference_factory, manager_registry):
+    """Test a chat turn returns the model reply and records both messages."""
+    agents_dir, data_dir = setup_dirs
+    _create_agents(agents_dir, [{"id": "trader", "name": "Trader", "heartbeat": {"enabled": False}}])
+    inference = inference_factory("Prices look stable.")
+
+    manager = AgentManager(agents_dir, data_dir, inference=inference, tool_registry=manager_registry)
+    reply = await manager.chat("trader", "How are prices?")
+
+    assert reply == "Prices look stable."
+    [call] = inference.calls
+    assert call["messages"][0]["role"] == "system"
+    assert call["messages"][-1] == {"role": "user", "content": "How are prices?"}
+    session = manager.session_store.get("agent:trader:main")
+    messages = manager.transcript_store.load(session.session_id).messages
+    assert [(m.role, m.content) for m in messages] == [
+        ("user", "How are prices?"),
+        ("assistant", "Prices look stable."),
+    ]
@@ -2,7 +2,6 @@
 
 import pytest
 from fastapi.testclient import TestClient
-from pathlib import Path
 import tempfile
 import os
 
@@ -12,9 +11,9 @@ os.environ["ATMOSPHERE_HOME"] = tempfile.mkdtemp()
 from openhoof.api.app import create_app
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def client():
-    """Create test client."""
+    """Create test client (app startup runs once per module)."""
     app = create_app()
     with TestClient(app) as client:
         yield client
@@ -1,12 +1,10 @@
 """Tests for event bus."""
 
-import pytest
-import asyncio
+import json
 
-from openhoof.core.events import EventBus, Event
+from openhoof.core.events import Event
 
 
-@pytest.mark.asyncio
 async def test_emit_event(event_bus):
     """Test emitting an event."""
     events_received = []
@@ -23,7 +21,6 @@ async def test_emit_event(event_bus):
     assert events_received[0].data["message"] == "hello"
 
 
-@pytest.mark.asyncio
 async def test_wildcard_subscriber(event_bus):
     """Test wildcard subscription."""
     events_received = []
@@ -39,7 +36,6 @@ async def test_wildcard_subscriber(event_bus):
     assert len(events_received) == 2
 
 
-@pytest.mark.asyncio
 async def test_get_recent_events(event_bus):
     """Test getting recent events."""
     for i in range(5):
@@ -48,9 +44,20 @@ async def test_get_recent_events(event_bus):
     recent = event_bus.get_recent_events(limit=3)
     
     assert len(recent) == 3
+    assert [e.data["i"] for e in recent] == [2, 3, 4]
+
+
+async def test_event_history_is_bounded(event_bus):
+    """Test history keeps only the newest events."""
+    for i in range(event_bus._max_history + 5):
+        await event_bus.emit("test:event", {"i": i})
+    
+    recent = event_bus.get_recent_events(limit=event_bus._max_history * 2)
+    
+    assert len(recent) == event_bus._max_history
+    assert recent[0].data["i"] == 5
 
 
-@pytest.mark.asyncio
 async def test_filter_events_by_type(event_bus):
     """Test filtering events by type."""
     await event_bus.emit("type:a", {"value": 1})
@@ -60,9 +67,12 @@ async def test_filter_events_by_type(event_bus):
     type_a_events = event_bus.get_recent_events(event_types=["type:a"])
     
     assert len(type_a_events) == 2
+    
+    # Any iterable of types works, e.g. a generator
+    both = event_bus.get_recent_events(event_types=(t for t in ("type:a", "type:b")))
+    assert [e.data["value"] for e in both] == [1, 2, 3]
 
 
-@pytest.mark.asyncio
 async def test_filter_events_by_agent(event_bus):
     """Test filtering events by agent_id."""
     await event_bus.emit("test", {"agent_id": "agent-1"})
@@ -74,6 +84,23 @@ async def test_filter_events_by_agent(event_bus):
     assert len(agent1_events) == 2
 
 
+async def test_reset(event_bus):
+    """Test reset drops history and subscribers."""
+    events_received = []
+    
+    async def handler(event: Event):
+        events_received.append(event)
+    
+    event_bus.subscribe("test:event", handler)
+    await event_bus.emit("test:event", {})
+    
+    event_bus.reset()
+    await event_bus.emit("test:event", {})
+    
+    assert len(events_received) == 1
+    assert [e.type for e in event_bus.get_recent_events()] == ["test:event"]
+
+
 def test_event_to_json():
     """Test event JSON serialization."""
     event = Event(
@@ -86,9 +113,14 @@ def test_event_to_json():
     assert "test:event" in json_str
     assert "key" in json_str
     assert "value" in json_str
+    assert json.loads(json_str) == {
+        "type": "test:event",
+        "data": {"key": "value"},
+        "timestamp": event.timestamp,
+        "event_id": None,
+    }
 
 
-@pytest.mark.asyncio
 async def test_unsubscribe(event_bus):
     """Test unsubscribing from events."""
     events_received = []
@@ -0,0 +1,70 @@
+"""Tests for heartbeat runner."""
+
+from datetime import datetime, time
+
+import pytest
+
+from openhoof.agents.heartbeat import HeartbeatConfig, HeartbeatRunner
+
+
+def make_runner(workspace_dir, *responses, **config):
+    """Build a runner whose callback replays responses (active all day by default)."""
+    config.setdefault("active_hours_start", None)
+    pending = list(responses)
+
+    async def run(agent_id, prompt):
+        reply = pending.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    return HeartbeatRunner(
+        agent_id="test-agent",
+        workspace_dir=workspace_dir,
+        config=HeartbeatConfig(**config),
+        run_callback=run,
+    )
+
+
+@pytest.mark.parametrize("reply,status,reason", [
+    ("HEARTBEAT_OK", "ran", "ok"),
+    ("Fuel is low at depot 3", "ran", "alert"),
+    (RuntimeError("model offline"), "failed", "model offline"),
+])
+async def test_run_once(temp_dir, reply, status, reason):
+    """Test heartbeat outcomes for ok, alert and failing turns."""
+    result = await make_runner(temp_dir, reply).run_once()
+
+    assert (result.status, result.reason) == (status, reason)
+
+
+async def test_run_once_disabled(temp_dir):
+    """Test a disabled heartbeat never calls the agent."""
+    result = await make_runner(temp_dir, enabled=False).run_once()
+
+    assert (result.status, result.reason) == ("skipped", "disabled")
+
+
+async def test_duplicate_alert_suppressed(temp_dir):
+    """Test the same alert twice in a row is skipped."""
+    runner = make_runner(temp_dir, "Fuel is low", "Fuel is low", "Fuel is fine")
+
+    assert (await runner.run_once()).reason == "alert"
+    assert (await runner.run_once()).reason == "duplicate"
+    assert (await runner.run_once()).reason == "alert"
+
+
+@pytest.mark.parametrize("hour,start,end,expected", [
+    (3, time(8, 0), time(23, 0), "quiet-hours"),
+    (12, time(8, 0), time(23, 0), "ok"),
+    (2, time(22, 0), time(6, 0), "ok"),
+    (12, time(22, 0), time(6, 0), "quiet-hours"),
+], ids=["before-day", "midday", "overnight", "outside-overnight"])
+async def test_active_hours(temp_dir, frozen_time, hour, start, end, expected):
+    """Test active-hours windows, including ones that span midnight."""
+    frozen_time[0] = datetime(2026, 2, 7, hour, 30).timestamp()
+    runner = make_runner(
+        temp_dir, "HEARTBEAT_OK", active_hours_start=start, active_hours_end=end
+    )
+
+    assert (await runner.run_once()).reason == expected
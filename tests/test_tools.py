@@ -1,19 +1,31 @@
 """Tests for tool framework."""
 
+import asyncio
+import os
+import shutil
+from collections import OrderedDict
 import pytest
 from pathlib import Path
 
-from openhoof.tools import Tool, ToolResult, ToolContext, ToolRegistry
+from openhoof.tools import ToolContext
+from openhoof.tools.builtin import exec as exec_module
+from openhoof.tools.builtin import shared as shared_module
 from openhoof.tools.builtin import (
     MemoryWriteTool,
     MemoryReadTool,
     NotifyTool,
     ExecTool,
+    SharedWriteTool,
+    SharedReadTool,
+    SharedLogTool,
+    SharedSearchTool,
+    SpawnAgentTool,
 )
 
 
-def make_context(workspace_dir: Path) -> ToolContext:
-    """Create a test tool context."""
+@pytest.fixture
+def tool_ctx(workspace_dir):
+    """Tool context for the test workspace."""
     return ToolContext(
         agent_id="test-agent",
         session_key="test:session",
@@ -21,155 +33,447 @@ def make_context(workspace_dir: Path) -> ToolContext:
     )
 
 
-def test_tool_registry(tool_registry):
+# Built-in tools keep no per-call state, so one instance serves a module
+
+@pytest.fixture(scope="module")
+def memory_write_tool():
+    """Create a memory write tool."""
+    return MemoryWriteTool()
+
+
+@pytest.fixture(scope="module")
+def memory_read_tool():
+    """Create a memory read tool."""
+    return MemoryReadTool()
+
+
+@pytest.fixture(scope="module")
+def exec_tool():
+    """Create an exec tool."""
+    return ExecTool()
+
+
+def test_tool_registry(builtin_registry):
     """Test tool registry operations."""
     # Should have built-in tools
-    assert tool_registry.get("memory_write") is not None
-    assert tool_registry.get("memory_read") is not None
-    assert tool_registry.get("notify") is not None
-    assert tool_registry.get("exec") is not None
+    assert builtin_registry.get("memory_write") is not None
+    assert builtin_registry.get("memory_read") is not None
+    assert builtin_registry.get("notify") is not None
+    assert builtin_registry.get("exec") is not None
+
 
+@pytest.fixture(scope="module")
+def openai_schemas(builtin_registry):
+    """Schemas for every built-in tool, built once per module."""
+    return builtin_registry.get_openai_schemas()
 
-def test_get_openai_schemas(tool_registry):
+
+def test_get_openai_schemas(builtin_registry, openai_schemas):
     """Test getting OpenAI tool schemas."""
-    schemas = tool_registry.get_openai_schemas()
+    schemas = openai_schemas
     
+    # Unchanged registry serves equal schemas from its cached selection
+    assert builtin_registry.get_openai_schemas() == schemas
     assert len(schemas) > 0
     assert all(s["type"] == "function" for s in schemas)
     assert all("function" in s for s in schemas)
 
 
-@pytest.mark.asyncio
-async def test_memory_write_tool(workspace_dir):
+async def test_memory_write_tool(memory_write_tool, tool_ctx, workspace_dir):
     """Test memory write tool."""
-    tool = MemoryWriteTool()
-    context = make_context(workspace_dir)
-    
-    result = await tool.execute({
+    result = await memory_write_tool.execute({
         "file": "TOOLS.md",
         "content": "# Tools\nTest content"
-    }, context)
+    }, tool_ctx)
     
     assert result.success
     assert (workspace_dir / "TOOLS.md").exists()
 
 
-@pytest.mark.asyncio
-async def test_memory_write_append(workspace_dir):
+async def test_memory_write_append(memory_write_tool, tool_ctx, workspace_dir):
     """Test memory write with append mode."""
-    tool = MemoryWriteTool()
-    context = make_context(workspace_dir)
-    
-    result = await tool.execute({
+    result = await memory_write_tool.execute({
         "file": "memory/2026-02-06.md",
         "content": "Test log entry",
         "append": True
-    }, context)
+    }, tool_ctx)
     
     assert result.success
     content = (workspace_dir / "memory" / "2026-02-06.md").read_text()
+    assert content.startswith("# Memory Log: 2026-02-06\n\n")
     assert "Test log entry" in content
-
-
-@pytest.mark.asyncio
-async def test_memory_write_security(workspace_dir):
-    """Test memory write security (can't escape workspace)."""
-    tool = MemoryWriteTool()
-    context = make_context(workspace_dir)
-    
-    result = await tool.execute({
-        "file": "../../../etc/passwd",
-        "content": "hacked"
-    }, context)
     
-    assert not result.success
-    assert "outside workspace" in result.error.lower()
+    await memory_write_tool.execute({
+        "file": "memory/2026-02-06.md",
+        "content": "Second entry",
+        "append": True
+    }, tool_ctx)
+    content = (workspace_dir / "memory" / "2026-02-06.md").read_text()
+    assert content.count("# Memory Log") == 1
+    assert content.index("Test log entry") < content.index("Second entry")
 
 
-@pytest.mark.asyncio
-async def test_memory_read_tool(workspace_dir):
+async def test_memory_read_tool(memory_read_tool, tool_ctx):
     """Test memory read tool."""
-    tool = MemoryReadTool()
-    context = make_context(workspace_dir)
-    
-    result = await tool.execute({
+    result = await memory_read_tool.execute({
         "file": "SOUL.md"
-    }, context)
+    }, tool_ctx)
     
     assert result.success
     assert result.data is not None
     assert "Test Agent" in result.data["content"]
 
 
-@pytest.mark.asyncio
-async def test_memory_read_not_found(workspace_dir):
-    """Test memory read for non-existent file."""
-    tool = MemoryReadTool()
-    context = make_context(workspace_dir)
+MEMORY_ERROR_CASES = [
+    ("write", {"file": "../../../etc/passwd", "content": "hacked"}, "outside workspace"),
+    ("read", {"file": "../../../etc/passwd"}, "outside workspace"),
+    ("read", {"file": "NONEXISTENT.md"}, "not found"),
+]
+
+
+async def test_memory_tool_errors(memory_write_tool, memory_read_tool, tool_ctx):
+    """Test memory tools refuse escapes and report missing files."""
+    tools = {"write": memory_write_tool, "read": memory_read_tool}
     
-    result = await tool.execute({
-        "file": "NONEXISTENT.md"
-    }, context)
+    results = await asyncio.gather(*(
+        tools[kind].execute(params, tool_ctx) for kind, params, _ in MEMORY_ERROR_CASES
+    ))
     
-    assert not result.success
-    assert "not found" in result.error.lower()
+    for (kind, params, needle), result in zip(MEMORY_ERROR_CASES, results):
+        assert not result.success, params
+        assert needle in result.error.lower(), result.error
 
 
-@pytest.mark.asyncio
-async def test_notify_tool(workspace_dir):
+async def test_notify_tool(tool_ctx):
     """Test notify tool (requires approval)."""
     tool = NotifyTool()
-    context = make_context(workspace_dir)
-    
     result = await tool.execute({
         "title": "Test Alert",
         "message": "This is a test notification",
         "priority": "high"
-    }, context)
+    }, tool_ctx)
     
     assert result.success
     assert result.requires_approval
     assert result.approval_id is not None
 
 
-@pytest.mark.asyncio
-async def test_exec_tool(workspace_dir):
+async def test_exec_tool(exec_tool, tool_ctx):
     """Test exec tool."""
-    tool = ExecTool()
-    context = make_context(workspace_dir)
-    
-    result = await tool.execute({
-        "command": "echo 'hello world'"
-    }, context)
+    # Independent commands, so run the subprocesses concurrently
+    ok, failed = await asyncio.gather(
+        exec_tool.execute({"command": "echo 'hello world'"}, tool_ctx),
+        exec_tool.execute({"command": "echo oops >&2; exit 3"}, tool_ctx),
+    )
     
-    assert result.success
-    assert "hello world" in result.data["stdout"]
+    assert ok.success
+    assert "hello world" in ok.data["stdout"]
+    assert not failed.success
+    assert failed.data["exit_code"] == 3
+    assert "oops" in failed.error
 
 
-@pytest.mark.asyncio
-async def test_exec_tool_dangerous_command(workspace_dir):
+async def test_exec_tool_dangerous_command(exec_tool, tool_ctx):
     """Test exec tool blocks dangerous commands."""
-    tool = ExecTool()
-    context = make_context(workspace_dir)
-    
-    result = await tool.execute({
+    result = await exec_tool.execute({
         "command": "rm -rf /"
-    }, context)
+    }, tool_ctx)
     
     assert not result.success
     assert "blocked" in result.error.lower()
 
 
-@pytest.mark.asyncio
-async def test_exec_tool_timeout(workspace_dir):
+class _HangingProcess:
+    """Subprocess stand-in whose output never arrives."""
+    
+    pid = None
+    
+    async def communicate(self):
+        await asyncio.Event().wait()
+    
+    async def wait(self):
+        return -9
+
+
+async def test_exec_tool_timeout(exec_tool, tool_ctx, monkeypatch):
     """Test exec tool timeout."""
-    tool = ExecTool()
-    context = make_context(workspace_dir)
+    killed = []
     
-    result = await tool.execute({
+    async def spawn(*args, **kwargs):
+        return _HangingProcess()
+    
+    # No real process, so the timeout fires without waiting on a child
+    monkeypatch.setattr(exec_module.asyncio, "create_subprocess_shell", spawn)
+    monkeypatch.setattr(exec_module, "_kill", killed.append)
+    result = await exec_tool.execute({
         "command": "sleep 10",
-        "timeout": 1
-    }, context)
+        "timeout": 0.01
+    }, tool_ctx)
     
     assert not result.success
     assert "timed out" in result.error.lower()
+    assert len(killed) == 1
+
+
+async def test_exec_tool_timeout_after_command_exited(exec_tool, tool_ctx, monkeypatch):
+    """Test a command that exits just before the kill still reports the timeout."""
+    async def spawn(*args, **kwargs):
+        return _HangingProcess()
+    
+    def gone(*args):
+        raise ProcessLookupError
+    
+    monkeypatch.setattr(exec_module.asyncio, "create_subprocess_shell", spawn)
+    monkeypatch.setattr(exec_module.os, "killpg", gone, raising=False)
+    monkeypatch.setattr(_HangingProcess, "kill", gone, raising=False)
+    result = await exec_tool.execute({
+        "command": "sleep 10",
+        "timeout": 0.01
+    }, tool_ctx)
+    
+    assert not result.success
+    assert "timed out" in result.error.lower()
+
+
+@pytest.mark.slow
+async def test_exec_tool_timeout_kills_command(exec_tool, tool_ctx):
+    """Test a real timed-out command is killed and reaped."""
+    result = await exec_tool.execute({
+        "command": "sleep 10",
+        "timeout": 0.2
+    }, tool_ctx)
+    
+    assert not result.success
+    assert "timed out" in result.error.lower()
+
+
+async def test_list_tools_cache_invalidated_on_register(tool_registry, tool_ctx):
+    """Test list_tools reflects registry changes."""
+    list_tool = tool_registry.get("list_tools")
+    first = await list_tool.execute({}, tool_ctx)
+    assert first.success
+    assert "exec" in [t["name"] for t in first.data["tools"]]
+    
+    tool_registry.unregister("exec")
+    second = await list_tool.execute({}, tool_ctx)
+    assert "exec" not in [t["name"] for t in second.data["tools"]]
+    assert second.data["count"] == first.data["count"] - 1
+
+
+async def test_execute_missing_required_param(builtin_registry, tool_ctx):
+    """Test the registry rejects calls missing a required parameter."""
+    for _ in range(2):
+        result = await builtin_registry.execute("memory_write", {"file": "TOOLS.md"}, tool_ctx)
+        assert not result.success
+        assert result.error == "Missing required parameter: content"
+
+
+async def test_spawn_agent_uses_callback(tool_ctx):
+    """Test spawn_agent hands the task to the manager's callback."""
+    calls = []
+    
+    async def spawn(**kwargs):
+        calls.append(kwargs)
+        return {"run_id": "run-1"}
+    
+    tool = SpawnAgentTool()
+    tool.spawn_callback = spawn
+    result = await tool.execute({"task": "Check fuel levels"}, tool_ctx)
+    
+    assert result.success
+    assert result.data["run_id"] == "run-1"
+    assert calls == [{
+        "requester_session_key": "test:session",
+        "agent_id": "test-agent",
+        "task": "Check fuel levels",
+        "label": None,
+        "timeout_seconds": 300,
+    }]
+
+
+def test_get_openai_schemas_edits_stay_local(tool_registry):
+    """Test a caller adjusting returned schemas doesn't change later results."""
+    schemas = tool_registry.get_openai_schemas(["exec"])
+    schemas[0]["strict"] = True
+    schemas[0]["function"]["description"] = "trimmed"
+    schemas.append({"type": "function"})
+    
+    [schema] = tool_registry.get_openai_schemas(["exec"])
+    assert "strict" not in schema
+    assert schema["function"]["description"] == tool_registry.get("exec").description
+
+
+def test_get_openai_schemas_filtered(tool_registry):
+    """Test schema filtering and cache invalidation."""
+    schemas = tool_registry.get_openai_schemas(["exec", "notify"])
+    assert sorted(s["function"]["name"] for s in schemas) == ["exec", "notify"]
+    
+    # Same selection in a different order hits the same cache entry
+    entries = len(tool_registry._schema_cache)
+    assert tool_registry.get_openai_schemas(["notify", "exec"]) == schemas
+    assert len(tool_registry._schema_cache) == entries
+    
+    tool_registry.unregister("exec")
+    schemas = tool_registry.get_openai_schemas(["exec", "notify"])
+    assert [s["function"]["name"] for s in schemas] == ["notify"]
+
+
+# Shared tools keep their caches at module level, so one instance each will do
+SHARED_WRITE = SharedWriteTool()
+SHARED_READ = SharedReadTool()
+SHARED_LOG = SharedLogTool()
+SHARED_SEARCH = SharedSearchTool()
+
+
+def make_shared_context(agents_dir: Path, agent_id: str = "test-agent") -> ToolContext:
+    """Create a tool context whose shared store lives beside agents_dir."""
+    workspace = agents_dir / agent_id
+    workspace.mkdir(exist_ok=True)
+    return ToolContext(
+        agent_id=agent_id,
+        session_key="test:session",
+        workspace_dir=str(workspace)
+    )
+
+
+async def test_shared_write_and_read(agents_dir):
+    """Test shared knowledge round trip across agents."""
+    writer = make_shared_context(agents_dir, "agent-a")
+    reader = make_shared_context(agents_dir, "agent-b")
+    
+    result = await SHARED_WRITE.execute({"key": "brief", "content": "v1"}, writer)
+    assert result.success
+    
+    result = await SHARED_READ.execute({"key": "brief"}, reader)
+    assert result.success
+    assert result.data["content"].endswith("v1")
+    
+    # A second write must invalidate the reader's cached copy
+    await SHARED_WRITE.execute({"key": "brief", "content": "v2"}, writer)
+    result = await SHARED_READ.execute({"key": "brief"}, reader)
+    assert result.data["content"].endswith("v2")
+
+
+async def test_shared_read_sees_edits_outside_shared_write(agents_dir):
+    """Test a cached read is dropped when the file changes without a version bump."""
+    context = make_shared_context(agents_dir)
+    await SHARED_WRITE.execute({"key": "notes", "content": "v1"}, context)
+    await SHARED_READ.execute({"key": "notes"}, context)
+    
+    file_path = agents_dir.parent / "data" / "shared" / "knowledge" / "notes.md"
+    st = file_path.stat()
+    file_path.write_text("edited by hand")
+    os.utime(file_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    
+    result = await SHARED_READ.execute({"key": "notes"}, context)
+    assert result.data["content"] == "edited by hand"
+
+
+async def test_shared_read_cache_is_bounded(agents_dir, monkeypatch):
+    """Test the read cache evicts the least recently read entry past its cap."""
+    monkeypatch.setattr(shared_module, "_READ_CACHE", OrderedDict())
+    monkeypatch.setattr(shared_module, "_READ_CACHE_MAX", 2)
+    context = make_shared_context(agents_dir)
+    for key in ("a", "b", "c"):
+        await SHARED_WRITE.execute({"key": key, "content": key}, context)
+    
+    await SHARED_READ.execute({"key": "a"}, context)
+    await SHARED_READ.execute({"key": "b"}, context)
+    await SHARED_READ.execute({"key": "a"}, context)
+    await SHARED_READ.execute({"key": "c"}, context)
+    
+    assert [Path(p).stem for p in shared_module._READ_CACHE] == ["a", "c"]
+
+
+@pytest.mark.parametrize("key", ["weather brief", "météo-2026", "v1..v2"])
+async def test_shared_accepts_plain_file_name_keys(agents_dir, key):
+    """Test keys with spaces or non-ASCII characters still round-trip."""
+    context = make_shared_context(agents_dir)
+    
+    assert (await SHARED_WRITE.execute({"key": key, "content": "ok"}, context)).success
+    result = await SHARED_READ.execute({"key": key}, context)
+    assert result.success
+    assert result.data["content"].endswith("ok")
+
+
+@pytest.mark.parametrize("key", ["../escape", "nested/key", "back\\slash", "nul\x00", ".hidden", ""])
+async def test_shared_rejects_invalid_keys(agents_dir, key):
+    """Test keys that would leave the knowledge directory are refused."""
+    context = make_shared_context(agents_dir)
+    
+    result = await SHARED_WRITE.execute({"key": key, "content": "x"}, context)
+    assert not result.success
+    assert "Invalid key" in result.error
+    
+    result = await SHARED_READ.execute({"key": key}, context)
+    assert not result.success
+    assert not (agents_dir.parent / "data" / "escape.md").exists()
+
+
+async def test_shared_tools_recreate_removed_store(agents_dir):
+    """Test writes still succeed after the shared directory is deleted at runtime."""
+    context = make_shared_context(agents_dir)
+    await SHARED_WRITE.execute({"key": "alpha", "content": "a"}, context)
+    shutil.rmtree(agents_dir.parent / "data" / "shared")
+    
+    assert (await SHARED_WRITE.execute({"key": "beta", "content": "b"}, context)).success
+    assert (await SHARED_LOG.execute({"finding": "store reset"}, context)).success
+    result = await SHARED_READ.execute({"key": "beta"}, context)
+    assert result.data["content"].endswith("b")
+
+
+async def test_shared_write_replaces_file_whole(agents_dir):
+    """Test a rewrite swaps in a new file and leaves no temp files behind."""
+    context = make_shared_context(agents_dir)
+    await SHARED_WRITE.execute({"key": "brief", "content": "v1"}, context)
+    knowledge_dir = agents_dir.parent / "data" / "shared" / "knowledge"
+    before = (knowledge_dir / "brief.md").stat()
+    
+    await SHARED_WRITE.execute({"key": "brief", "content": "v2"}, context)
+    after = (knowledge_dir / "brief.md").stat()
+    assert after.st_ino != before.st_ino
+    assert after.st_mode & 0o777 == 0o644
+    assert os.listdir(knowledge_dir) == ["brief.md"]
+
+
+async def test_shared_search_respects_limit(agents_dir):
+    """Test shared search returns at most `limit` results."""
+    context = make_shared_context(agents_dir)
+    for i in range(5):
+        await SHARED_LOG.execute({"finding": f"pressure spike {i}"}, context)
+    
+    result = await SHARED_SEARCH.execute({"query": "spike", "limit": 2}, context)
+    
+    assert result.success
+    assert result.data["total"] == 2
+    assert [r["finding"] for r in result.data["results"]] == ["pressure spike 0", "pressure spike 1"]
+
+
+async def test_shared_read_missing_lists_keys(agents_dir):
+    """Test a shared read miss suggests existing keys."""
+    context = make_shared_context(agents_dir)
+    await SHARED_WRITE.execute({"key": "alpha", "content": "a"}, context)
+    
+    result = await SHARED_READ.execute({"key": "missing"}, context)
+    assert not result.success
+    assert "alpha" in result.error
+    
+    await SHARED_WRITE.execute({"key": "beta", "content": "b"}, context)
+    result = await SHARED_READ.execute({"key": "missing"}, context)
+    assert "beta" in result.error
+
+
+async def test_shared_read_sees_keys_written_elsewhere(agents_dir):
+    """Test the key listing rescans when another process adds a file."""
+    context = make_shared_context(agents_dir)
+    await SHARED_WRITE.execute({"key": "alpha", "content": "a"}, context)
+    await SHARED_READ.execute({"key": "missing"}, context)
+    
+    knowledge_dir = agents_dir.parent / "data" / "shared" / "knowledge"
+    (knowledge_dir / "gamma.md").write_bytes(b"g")
+    # Bump the directory mtime explicitly instead of waiting out its granularity
+    st = knowledge_dir.stat()
+    os.utime(knowledge_dir, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    
+    result = await SHARED_READ.execute({"key": "missing"}, context)
+    assert "gamma" in result.error
@@ -0,0 +1,225 @@
+"""Tests for the tool-router training helpers."""
+
+import json
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from training import train_tool_router as ttr
+
+
+@pytest.mark.parametrize(
+    "quantize,backend,has_bnb,expected",
+    [
+        ("nf4", "cuda", True, "nf4"),
+        ("int8", "cuda", True, "int8"),
+        ("none", "cuda", True, "none"),
+        ("nf4", "cuda", False, "none"),
+        ("int8", "cuda", False, "none"),
+        ("nf4", "mlx", False, "nf4"),
+        ("int8", "mlx", False, "nf4"),
+        ("none", "mlx", False, "none"),
+    ],
+)
+def test_resolve_quantization(monkeypatch, quantize, backend, has_bnb, expected):
+    real_find_spec = ttr.importlib.util.find_spec
+
+    def find_spec(name):
+        if name == "bitsandbytes":
+            return object() if has_bnb else None
+        return real_find_spec(name)
+
+    monkeypatch.setattr(ttr.importlib.util, "find_spec", find_spec)
+    assert ttr.resolve_quantization(quantize, backend) == expected
+
+
+@pytest.mark.parametrize(
+    "quantize,expected",
+    [
+        ("none", {"load_in_4bit": False}),
+        ("nf4", {"load_in_4bit": True}),
+        ("int8", {"load_in_4bit": False, "load_in_8bit": True}),
+    ],
+)
+def test_quantization_kwargs(quantize, expected):
+    assert ttr.quantization_kwargs(quantize) == expected
+
+
+class _FakeDataset(list):
+    """List-backed stand-in for datasets.Dataset that saves as a marker dir."""
+
+    column_names = ("text",)
+
+    @classmethod
+    def from_list(cls, rows):
+        return cls(rows)
+
+    def save_to_disk(self, path):
+        os.makedirs(path)
+
+    def map(self, fn, **kwargs):
+        return _FakeDataset([{"input_ids": [1]}])
+
+
+@pytest.fixture
+def dataset_loads(tmp_path, monkeypatch):
+    """Point DATA_DIR at tmp_path with a fake datasets module; returns recorded loads."""
+    loads = []
+    fake = SimpleNamespace(
+        Dataset=_FakeDataset,
+        load_from_disk=lambda path: loads.append(path) or _FakeDataset(),
+    )
+    monkeypatch.setitem(sys.modules, "datasets", fake)
+    monkeypatch.setattr(ttr, "DATA_DIR", tmp_path)
+    rows = (
+        {"input": {"user_message": f"check sensor {i}"}, "output": {"tool_calls": []}}
+        for i in range(12)
+    )
+    (tmp_path / "synthetic_training.jsonl").write_text("".join(json.dumps(r) + "\n" for r in rows))
+    return loads
+
+
+def _touch_data(data_dir):
+    """Bump the data file's mtime so cache keys move on."""
+    path = data_dir / "synthetic_training.jsonl"
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def test_dataset_cache_key(tmp_path, dataset_loads):
+    chat = ttr._dataset_cache_dir("chat")
+    assert chat == ttr._dataset_cache_dir("chat")
+    assert chat.parent == tmp_path / ".ds_cache"
+    assert ttr._dataset_cache_dir("instruction") != chat
+
+    _touch_data(tmp_path)
+    assert ttr._dataset_cache_dir("chat") != chat
+
+
+def test_build_dataset_cache_hit_miss_and_prune(tmp_path, dataset_loads):
+    first = ttr.build_dataset("chat")
+    assert len(first) == 12 and dataset_loads == []
+
+    ttr.build_dataset("chat")
+    assert dataset_loads == [str(ttr._dataset_cache_dir("chat"))]
+
+    _touch_data(tmp_path)
+    ttr.build_dataset("chat")
+    assert len(dataset_loads) == 1
+    assert [p.name for p in (tmp_path / ".ds_cache").iterdir()] == [ttr._dataset_cache_dir("chat").name]
+
+
+def test_tokenize_dataset_prunes_only_token_caches(tmp_path, dataset_loads):
+    tokenizer = lambda texts, **kwargs: {"input_ids": [[1]] * len(texts)}
+    dataset = ttr.build_dataset("chat")
+    ttr.tokenize_dataset(dataset, tokenizer, "base", 512)
+    ttr.tokenize_dataset(dataset, tokenizer, "base", 512)
+    assert len(dataset_loads) == 1
+
+    ttr.tokenize_dataset(dataset, tokenizer, "base", 1024)
+    names = sorted(p.name for p in (tmp_path / ".ds_cache").iterdir())
+    assert len(names) == 2
+    assert names[0] == ttr._dataset_cache_dir("chat").name and names[1].startswith("tok-")
+
+
+def test_train_exits_on_too_little_data_before_loading(tmp_path, monkeypatch):
+    monkeypatch.setattr(ttr, "DATA_DIR", tmp_path)
+    (tmp_path / "synthetic_training.jsonl").write_text('{"input": {}}\n' * 3)
+
+    def load_libs(backend):
+        raise AssertionError("training libraries should not load")
+
+    monkeypatch.setattr(ttr, "import_training_libs", load_libs)
+    with pytest.raises(SystemExit):
+        ttr.train(backend="cuda")
+
+
+COUNT_CASES = {
+    "empty": b"",
+    "plain": b'{"a": 1}\n{"b": 2}\n',
+    "leading-blank": b'\n{"a": 1}\n',
+    "leading-whitespace": b' \t\n{"a": 1}\n',
+    "crlf": b'{"a": 1}\r\n\r\n{"b": 2}\r\n',
+    "no-trailing-newline": b'{"a": 1}\n{"b": 2}',
+    "whitespace-tail": b'{"a": 1}\n  ',
+    "blank-runs": b'a\n\n\nb\n\n \n\t\nc\n\n',
+    "only-blanks": b"\n\n \n",
+    "indented": b' {"a": 1}\n\t{"b": 2}\n \n',
+}
+
+
+def _naive_count(path) -> int:
+    with open(path, "rb") as f:
+        return sum(1 for line in f if line.strip())
+
+
+@pytest.fixture
+def fresh_counts():
+    """Forget in-process line counts so each test exercises the scan or the sidecar."""
+    ttr._count_lines.cache_clear()
+    yield
+    ttr._count_lines.cache_clear()
+
+
+# None reads the whole file; small chunk sizes put chunk edges inside "\n\n" runs
+@pytest.mark.parametrize("chunk_size", [None, 1, 2, 3, 5, 8])
+@pytest.mark.parametrize("name", list(COUNT_CASES))
+def test_count_lines_matches_naive(tmp_path, monkeypatch, fresh_counts, name, chunk_size):
+    path = tmp_path / "data.jsonl"
+    path.write_bytes(COUNT_CASES[name])
+    if chunk_size is not None:
+        monkeypatch.setattr(ttr, "_READ_ALL_MAX_SIZE", -1)
+        monkeypatch.setattr(ttr, "_CHUNK_SIZE", chunk_size)
+
+    assert ttr.count_lines(path) == _naive_count(path)
+
+
+@pytest.mark.parametrize("step", [1 << 24, 1, 3])
+@pytest.mark.parametrize("name", list(COUNT_CASES))
+def test_count_lines_mmap_matches_naive(tmp_path, monkeypatch, fresh_counts, name, step):
+    pytest.importorskip("numpy")
+    path = tmp_path / "data.jsonl"
+    path.write_bytes(COUNT_CASES[name])
+    if not COUNT_CASES[name]:
+        pytest.skip("empty files can't be mapped")
+    monkeypatch.setattr(ttr, "_MMAP_MIN_SIZE", 0)
+    monkeypatch.setattr(ttr, "_MMAP_STEP", step)
+
+    assert ttr.count_lines(path) == _naive_count(path)
+
+
+def test_count_lines_sidecar_hit_and_invalidation(tmp_path, monkeypatch, fresh_counts):
+    path = tmp_path / "data.jsonl"
+    path.write_bytes(b'{"a": 1}\n\n{"b": 2}\n')
+    assert ttr.count_lines(path) == 2
+    assert (tmp_path / ttr.STATS_CACHE_NAME).exists()
+
+    # A fresh process (no lru entry) answers from the sidecar without scanning
+    ttr._count_lines.cache_clear()
+    scans = []
+    real_scan = ttr._scan_lines
+    monkeypatch.setattr(ttr, "_scan_lines", lambda *args: scans.append(args) or real_scan(*args))
+    assert ttr.count_lines(path) == 2
+    assert scans == []
+
+    # Any change to size or mtime forces a rescan and refreshes the sidecar
+    with open(path, "ab") as f:
+        f.write(b'{"c": 3}\n')
+    ttr._count_lines.cache_clear()
+    assert ttr.count_lines(path) == 3
+    assert len(scans) == 1
+
+    ttr._count_lines.cache_clear()
+    assert ttr.count_lines(path) == 3
+    assert len(scans) == 1
+
+
+def test_count_in_background(tmp_path, fresh_counts):
+    path = tmp_path / "data.jsonl"
+    path.write_bytes(b'{"a": 1}\n\n{"b": 2}\n')
+    assert ttr._count_in_background(path).result(timeout=5) == 2
+
+    with pytest.raises(FileNotFoundError):
+        ttr._count_in_background(tmp_path / "missing.jsonl").result(timeout=5)
@@ -1,9 +1,8 @@
 """Tests for transcript management."""
 
 import pytest
-from datetime import datetime
 
-from openhoof.core.transcripts import TranscriptStore, Transcript, Message
+from openhoof.core.transcripts import Message
 
 
 def test_append_message(transcript_store):
@@ -43,29 +42,31 @@ def test_load_transcript(transcript_store):
 def test_get_messages_for_context(transcript_store):
     """Test getting messages for context window."""
     # Add many messages
-    for i in range(60):
-        transcript_store.append_message(
-            session_id="session-3",
-            agent_id="test-agent",
-            message=Message(role="user" if i % 2 == 0 else "assistant", content=f"Message {i}")
-        )
+    transcript_store.append_messages(
+        session_id="session-3",
+        agent_id="test-agent",
+        messages=[
+            Message(role="user" if i % 2 == 0 else "assistant", content=f"Message {i}")
+            for i in range(60)
+        ]
+    )
     
     # Get limited messages
     messages = transcript_store.get_messages_for_context("session-3", max_messages=10)
     
     # Should have last 10 messages
     assert len(messages) == 10
+    assert messages[-1].content == "Message 59"
 
 
 def test_compact_transcript(transcript_store):
     """Test transcript compaction."""
     # Add messages
-    for i in range(20):
-        transcript_store.append_message(
-            session_id="session-4",
-            agent_id="test-agent",
-            message=Message(role="user", content=f"Message {i}")
-        )
+    transcript_store.append_messages(
+        session_id="session-4",
+        agent_id="test-agent",
+        messages=[Message(role="user", content=f"Message {i}") for i in range(20)]
+    )
     
     # Compact
     transcript = transcript_store.compact(
@@ -94,23 +95,46 @@ def test_delete_transcript(transcript_store):
     assert transcript_store.load("session-5") is None
 
 
-def test_message_to_openai_format():
-    """Test converting message to OpenAI format."""
-    msg = Message(role="user", content="Hello world")
-    openai_format = msg.to_openai_format()
+def test_append_updates_timestamps(transcript_store, frozen_time):
+    """Test appends stamp messages and bump updated_at from the store clock."""
+    start = frozen_time[0]
+    transcript_store.append_message(
+        session_id="session-6",
+        agent_id="test-agent",
+        message=Message(role="user", content="First")
+    )
     
-    assert openai_format["role"] == "user"
-    assert openai_format["content"] == "Hello world"
-
-
-def test_tool_message_format():
-    """Test tool message format."""
-    msg = Message(
-        role="tool",
-        content="Tool result",
-        tool_call_id="call_123"
+    frozen_time[0] += 90
+    transcript = transcript_store.append_message(
+        session_id="session-6",
+        agent_id="test-agent",
+        message=Message(role="user", content="Second")
     )
-    openai_format = msg.to_openai_format()
     
-    assert openai_format["role"] == "tool"
-    assert openai_format["tool_call_id"] == "call_123"
+    assert transcript.created_at == start
+    assert transcript.updated_at == start + 90
+    assert [m.timestamp for m in transcript.messages] == [start, start + 90]
+
+
+@pytest.mark.parametrize("message,expected", [
+    (
+        Message(role="user", content="Hello world"),
+        {"role": "user", "content": "Hello world"},
+    ),
+    (
+        Message(role="tool", content="Tool result", tool_call_id="call_123"),
+        {"role": "tool", "content": "Tool result", "tool_call_id": "call_123"},
+    ),
+    (
+        Message(role="assistant", content="", tool_calls=[{"id": "call_1"}]),
+        {"role": "assistant", "content": "", "tool_calls": [{"id": "call_1"}]},
+    ),
+    (
+        # Tool call ids only apply to tool messages
+        Message(role="user", content="Hi", tool_call_id="call_9", thinking="hmm"),
+        {"role": "user", "content": "Hi"},
+    ),
+], ids=["user", "tool", "assistant-tool-calls", "extra-fields-dropped"])
+def test_message_to_openai_format(message, expected):
+    """Test converting messages to OpenAI format."""
+    assert message.to_openai_format() == expected
@@ -1,8 +1,5 @@
 """Tests for workspace management."""
 
-import pytest
-from pathlib import Path
-
 from openhoof.core.workspace import (
     load_workspace,
     ensure_workspace,
@@ -12,7 +9,6 @@ from openhoof.core.workspace import (
 )
 
 
-@pytest.mark.asyncio
 async def test_ensure_workspace(temp_dir):
     """Test workspace creation."""
     workspace = temp_dir / "new-agent"
@@ -25,7 +21,6 @@ async def test_ensure_workspace(temp_dir):
     assert (workspace / "skills").exists()
 
 
-@pytest.mark.asyncio
 async def test_load_workspace(workspace_dir):
     """Test loading a workspace."""
     workspace = await load_workspace(workspace_dir)
@@ -36,7 +31,6 @@ async def test_load_workspace(workspace_dir):
     assert workspace.agents is not None
 
 
-@pytest.mark.asyncio
 async def test_build_bootstrap_context(workspace_dir):
     """Test building bootstrap context."""
     workspace = await load_workspace(workspace_dir)
@@ -47,22 +41,20 @@ async def test_build_bootstrap_context(workspace_dir):
     assert "AGENTS.md" in context
 
 
-@pytest.mark.asyncio
 async def test_write_workspace_file(workspace_dir):
     """Test writing workspace files."""
     await write_workspace_file(workspace_dir, "memory/2026-02-06.md", "# Test Memory")
     
     file_path = workspace_dir / "memory" / "2026-02-06.md"
     assert file_path.exists()
-    assert file_path.read_text() == "# Test Memory"
+    assert file_path.read_bytes() == b"# Test Memory"
 
 
-@pytest.mark.asyncio
 async def test_delete_workspace_file(workspace_dir):
     """Test deleting workspace files."""
     # Create a file
     test_file = workspace_dir / "BOOTSTRAP.md"
-    test_file.write_text("# Bootstrap")
+    test_file.write_bytes(b"# Bootstrap")
     
     # Delete it
     result = await delete_workspace_file(workspace_dir, "BOOTSTRAP.md")
@@ -71,8 +63,40 @@ async def test_delete_workspace_file(workspace_dir):
     assert not test_file.exists()
 
 
-@pytest.mark.asyncio
 async def test_delete_nonexistent_file(workspace_dir):
     """Test deleting a file that doesn't exist."""
     result = await delete_workspace_file(workspace_dir, "NONEXISTENT.md")
     assert result is False
+
+
+async def test_ensure_workspace_from_templates(temp_dir):
+    """Test provisioning from templates without clobbering existing files."""
+    templates = temp_dir / "templates"
+    templates.mkdir()
+    (templates / "SOUL.md").write_bytes(b"# Template Soul")
+    (templates / "AGENTS.md").write_bytes(b"# Template Agents")
+    
+    first = await ensure_workspace(temp_dir / "agent-a", templates_dir=templates)
+    assert (first / "SOUL.md").read_bytes() == b"# Template Soul"
+    assert not (first / "TOOLS.md").exists()
+    
+    second = temp_dir / "agent-b"
+    second.mkdir()
+    (second / "SOUL.md").write_bytes(b"# Custom Soul")
+    await ensure_workspace(second, templates_dir=templates)
+    assert (second / "SOUL.md").read_bytes() == b"# Custom Soul"
+    assert (second / "AGENTS.md").read_bytes() == b"# Template Agents"
+
+
+async def test_ensure_workspace_picks_up_template_edits(temp_dir):
+    """Test templates edited after first use reach new workspaces."""
+    templates = temp_dir / "templates"
+    templates.mkdir()
+    (templates / "SOUL.md").write_bytes(b"# Soul v1")
+    await ensure_workspace(temp_dir / "agent-a", templates_dir=templates)
+    
+    (templates / "SOUL.md").write_bytes(b"# Soul v2!")
+    (templates / "USER.md").write_bytes(b"# User")
+    second = await ensure_workspace(temp_dir / "agent-b", templates_dir=templates)
+    assert (second / "SOUL.md").read_bytes() == b"# Soul v2!"
+    assert (second / "USER.md").read_bytes() == b"# User"
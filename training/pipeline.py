@@ -27,14 +27,45 @@ Usage:
 
 import argparse
 import asyncio
+import csv
 import json
 import os
 import sys
+from collections import Counter
 from pathlib import Path
 from datetime import datetime
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from training.train_tool_router import (
+    QUANTIZE_CHOICES,
+    count_lines,
+    iter_jsonl,
+    json_dumps,
+    json_loads,
+)
+
 DATA_DIR = Path.home() / ".openhoof" / "data" / "function_pipeline"
 MODEL_DIR = Path.home() / ".openhoof" / "models" / "tool-router"
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+# training_meta.json contents keyed on run dir, stamped with the file's mtime
+_META_CACHE: dict = {}
+
+
+def _load_run_meta(run_path: str):
+    """Return a run's training metadata, or None if it has none."""
+    meta_path = os.path.join(run_path, "training_meta.json")
+    try:
+        mtime_ns = os.stat(meta_path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    cached = _META_CACHE.get(run_path)
+    if cached is None or cached[0] != mtime_ns:
+        with open(meta_path, "rb") as f:
+            cached = _META_CACHE[run_path] = (mtime_ns, json_loads(f.read()))
+    return cached[1]
 
 
 def cmd_status():
@@ -46,7 +77,7 @@ def cmd_status():
     for name in ["synthetic_training.jsonl", "training_data.jsonl"]:
         path = DATA_DIR / name
         if path.exists():
-            count = sum(1 for line in path.open() if line.strip())
+            count = count_lines(path)
             print(f"  📊 {name}: {count} examples")
             total += count
         else:
@@ -58,17 +89,16 @@ def cmd_status():
     # Outcomes
     outcomes_path = DATA_DIR / "outcomes.jsonl"
     if outcomes_path.exists():
-        count = sum(1 for line in outcomes_path.open() if line.strip())
+        count = count_lines(outcomes_path)
         print(f"  📊 Outcome feedback: {count}")
 
     # Trained models
     print()
     if MODEL_DIR.exists():
-        runs = sorted(MODEL_DIR.iterdir())
+        runs = sorted((e for e in os.scandir(MODEL_DIR) if e.is_dir()), key=lambda e: e.name)
         for run_dir in runs:
-            meta_path = run_dir / "training_meta.json"
-            if meta_path.exists():
-                meta = json.loads(meta_path.read_text())
+            meta = _load_run_meta(run_dir.path)
+            if meta is not None:
                 print(f"  🧠 {run_dir.name}:")
                 print(f"     Examples: {meta.get('training_examples', '?')}")
                 print(f"     Loss:     {meta.get('final_loss', '?'):.4f}" if isinstance(meta.get('final_loss'), (int, float)) else f"     Loss:     {meta.get('final_loss', '?')}")
@@ -91,9 +121,6 @@ def cmd_generate(count: int = 50):
     """Generate more synthetic training data."""
     print(f"Generating {count} synthetic training examples...\n")
 
-    # Use the experiment script's synthetic generation
-    sys.path.insert(0, str(Path(__file__).parent.parent))
-
     async def _generate():
         import aiohttp
 
@@ -128,7 +155,6 @@ def cmd_generate(count: int = 50):
 
         data_path = DATA_DIR / "synthetic_training.jsonl"
         data_path.parent.mkdir(parents=True, exist_ok=True)
-        generated = 0
 
         async with aiohttp.ClientSession() as session:
             # Check runtime
@@ -142,8 +168,20 @@ def cmd_generate(count: int = 50):
                 return 0
 
             per_category = max(1, count // len(categories))
-
-            for tool_name, desc in categories:
+            # Cap in-flight requests so the local runtime isn't swamped
+            limit = asyncio.Semaphore(4)
+            # Shared request body; only the user prompt differs per category
+            base_body = {
+                "model": "unsloth/Qwen3-1.7B-GGUF:Q4_K_M",  # Use what we have
+                "messages": [
+                    {"role": "system", "content": "Generate training data. Output ONLY valid JSON arrays."},
+                    None,
+                ],
+                "max_tokens": 1500,
+                "temperature": 0.9,
+            }
+
+            async def one(tool_name, desc):
                 if tool_name == "multi":
                     prompt = f"""Generate {per_category} realistic user messages that require MULTIPLE tools from the list.
 
@@ -163,52 +201,52 @@ Output a JSON array: [{{"user_message": "...", "tool_calls": []}}]"""
 Output a JSON array: [{{"user_message": "...", "tool_calls": [{{"name": "{tool_name}", "arguments": {{...}}}}]}}]
 Include realistic argument values."""
 
-                try:
-                    body = {
-                        "model": "unsloth/Qwen3-1.7B-GGUF:Q4_K_M",  # Use what we have
-                        "messages": [
-                            {"role": "system", "content": "Generate training data. Output ONLY valid JSON arrays."},
-                            {"role": "user", "content": prompt}
-                        ],
-                        "max_tokens": 1500,
-                        "temperature": 0.9,
-                    }
-
-                    async with session.post(UNIVERSAL_URL, json=body, timeout=aiohttp.ClientTimeout(total=60)) as resp:
-                        if resp.status != 200:
-                            print(f"  ⚠️ Failed for {tool_name}")
-                            continue
-                        data = await resp.json()
-
-                    content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
-
-                    if "[" in content:
-                        start = content.index("[")
-                        end = content.rindex("]") + 1
-                        examples = json.loads(content[start:end])
-
-                        batch = 0
-                        for ex in examples:
-                            if isinstance(ex, dict) and "user_message" in ex:
-                                entry = {
-                                    "input": {"user_message": ex["user_message"], "tools": tools},
-                                    "output": {"tool_calls": ex.get("tool_calls", [])},
-                                    "metadata": {"source": "pipeline_synthetic", "target": tool_name,
-                                                 "timestamp": datetime.now().isoformat()}
-                                }
-                                with open(data_path, "a") as f:
-                                    f.write(json.dumps(entry) + "\n")
-                                generated += 1
-                                batch += 1
-                        print(f"  ✅ {tool_name}: {batch} examples")
-
-                except Exception as e:
-                    print(f"  ⚠️ {tool_name}: {e}")
-
-        return generated
+                base_body["messages"][1] = {"role": "user", "content": prompt}
+                payload = json_dumps(base_body)
+
+                async with limit, session.post(UNIVERSAL_URL, data=payload, headers=JSON_HEADERS,
+                                               timeout=aiohttp.ClientTimeout(total=60)) as resp:
+                    if resp.status != 200:
+                        print(f"  ⚠️ Failed for {tool_name}")
+                        return tool_name, []
+                    data = await resp.json()
+
+                content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
+
+                entries = []
+                if "[" in content:
+                    start = content.index("[")
+                    end = content.rindex("]") + 1
+                    examples = json.loads(content[start:end])
+
+                    for ex in examples:
+                        if isinstance(ex, dict) and "user_message" in ex:
+                            entries.append({
+                                "input": {"user_message": ex["user_message"], "tools": tools},
+                                "output": {"tool_calls": ex.get("tool_calls", [])},
+                                "metadata": {"source": "pipeline_synthetic", "target": tool_name,
+                                             "timestamp": datetime.now().isoformat()}
+                            })
+                    print(f"  ✅ {tool_name}: {len(entries)} examples")
+                return tool_name, entries
+
+            results = await asyncio.gather(
+                *[one(t, d) for t, d in categories], return_exceptions=True
+            )
+
+        all_entries: list[str] = []
+        for (tool_name, _), result in zip(categories, results):
+            if isinstance(result, Exception):
+                print(f"  ⚠️ {tool_name}: {result}")
+                continue
+            all_entries.extend(json_dumps(entry) + "\n" for entry in result[1])
+
+        with open(data_path, "a", buffering=1 << 20, encoding="utf-8") as f:
+            f.writelines(all_entries)
+        return len(all_entries)
 
     generated = asyncio.run(_generate())
-    total = sum(1 for line in (DATA_DIR / "synthetic_training.jsonl").open() if line.strip())
+    total = count_lines(DATA_DIR / "synthetic_training.jsonl")
     print(f"\nGenerated {generated} new examples. Total: {total}")
 
 
@@ -216,58 +254,41 @@ def cmd_export():
     """Export training data in different formats for inspection."""
     DATA_DIR.mkdir(parents=True, exist_ok=True)
 
-    # Load all data
-    examples = []
-    for name in ["synthetic_training.jsonl", "training_data.jsonl"]:
-        path = DATA_DIR / name
-        if not path.exists():
-            continue
-        for line in path.open():
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                entry = json.loads(line)
-                inp = entry.get("input", {})
-                out = entry.get("output", {})
-                examples.append({
-                    "user_message": inp.get("user_message", ""),
-                    "tool_calls": out.get("tool_calls", []),
-                    "source": entry.get("metadata", {}).get("source", "unknown"),
-                })
-            except json.JSONDecodeError:
-                continue
-
-    # Export as Alpaca format
     alpaca_path = DATA_DIR / "export_alpaca.jsonl"
-    with open(alpaca_path, "w") as f:
-        for ex in examples:
-            f.write(json.dumps({
-                "instruction": "Select the appropriate tool(s) for the user's request. Respond with a JSON array.",
-                "input": ex["user_message"],
-                "output": json.dumps(ex["tool_calls"]),
-            }) + "\n")
-
-    # Export as CSV for easy viewing
     csv_path = DATA_DIR / "export_overview.csv"
-    with open(csv_path, "w") as f:
-        f.write("user_message,tools_called,source\n")
-        for ex in examples:
-            tools_str = ";".join(c.get("name", "") for c in ex["tool_calls"] if isinstance(c, dict))
-            msg = ex["user_message"].replace('"', '""')
-            f.write(f'"{msg}","{tools_str}","{ex["source"]}"\n')
-
-    # Stats by tool
-    from collections import Counter
     tool_counts = Counter()
-    for ex in examples:
-        for tc in ex["tool_calls"]:
-            if isinstance(tc, dict):
-                tool_counts[tc.get("name", "unknown")] += 1
-        if not ex["tool_calls"]:
-            tool_counts["(no tool)"] += 1
-
-    print(f"Exported {len(examples)} examples:")
+    exported = 0
+
+    # One streaming pass: Alpaca for training, CSV for easy viewing, stats by tool
+    with open(alpaca_path, "w", encoding="utf-8") as alpaca_f, \
+            open(csv_path, "w", newline="", encoding="utf-8") as csv_f:
+        writer = csv.writer(csv_f)
+        writer.writerow(["user_message", "tools_called", "source"])
+        for name in ["synthetic_training.jsonl", "training_data.jsonl"]:
+            path = DATA_DIR / name
+            if not path.exists():
+                continue
+            for entry in iter_jsonl(path):
+                user_message = entry.get("input", {}).get("user_message", "")
+                tool_calls = entry.get("output", {}).get("tool_calls", [])
+                calls = [c for c in tool_calls if isinstance(c, dict)]
+
+                alpaca_f.write(json_dumps({
+                    "instruction": "Select the appropriate tool(s) for the user's request. Respond with a JSON array.",
+                    "input": user_message,
+                    "output": json.dumps(tool_calls),
+                }) + "\n")
+                writer.writerow((
+                    user_message,
+                    ";".join(c.get("name", "") for c in calls),
+                    entry.get("metadata", {}).get("source", "unknown"),
+                ))
+                tool_counts.update(c.get("name", "unknown") for c in calls)
+                if not tool_calls:
+                    tool_counts["(no tool)"] += 1
+                exported += 1
+
+    print(f"Exported {exported} examples:")
     print(f"  Alpaca: {alpaca_path}")
     print(f"  CSV:    {csv_path}")
     print(f"\nTool distribution:")
@@ -284,14 +305,14 @@ def cmd_run(args):
     for name in ["synthetic_training.jsonl", "training_data.jsonl"]:
         path = DATA_DIR / name
         if path.exists():
-            total += sum(1 for line in path.open() if line.strip())
+            total += count_lines(path)
 
     print(f"Step 1: Data check — {total} examples available")
 
     if total < 50 and not args.force:
         print(f"  Need at least 50 examples. Generating more...")
         cmd_generate(100)
-        total = sum(1 for line in (DATA_DIR / "synthetic_training.jsonl").open() if line.strip())
+        total = count_lines(DATA_DIR / "synthetic_training.jsonl")
 
     # Step 2: Train
     print(f"\nStep 2: Training with {total} examples...")
@@ -302,6 +323,7 @@ def cmd_run(args):
         learning_rate=args.lr,
         batch_size=args.batch_size,
         format_style=args.format,
+        quantize=args.quantize,
     )
 
     if meta:
@@ -331,6 +353,7 @@ def main():
     run.add_argument("--lr", type=float, default=2e-4)
     run.add_argument("--batch-size", type=int, default=4)
     run.add_argument("--format", choices=["chat", "instruction"], default="chat")
+    run.add_argument("--quantize", choices=QUANTIZE_CHOICES, default="nf4")
     run.add_argument("--force", action="store_true")
 
     args = parser.parse_args()
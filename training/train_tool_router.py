@@ -15,27 +15,73 @@ Usage:
     python training/train_tool_router.py --epochs 5 --lr 2e-4 --batch-size 4
 """
 
-import argparse
+import functools
+import hashlib
+import importlib.util
 import json
+import mmap
 import os
 import platform
+import re
+import shutil
 import sys
+import tempfile
+import threading
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
+from typing import Optional
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+if orjson is not None:
+    json_loads = orjson.loads
+
+    def json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+else:
+    json_loads = json.loads
+    json_dumps = json.dumps
 
 # ============================================================
 # Cross-platform import: unsloth-mlx on Mac, unsloth on Linux
 # ============================================================
+@functools.cache
 def get_backend():
-    """Detect the best backend for this platform."""
-    if platform.system() == "Darwin":
+    """Detect the best backend for this platform.
+
+    MLX on Apple Silicon when it is installed, CUDA when a GPU is visible,
+    otherwise "cpu", which train() refuses.
+    """
+    if (
+        platform.system() == "Darwin"
+        and platform.machine() == "arm64"
+        and importlib.util.find_spec("mlx") is not None
+    ):
+        print("Backend: mlx (Apple Silicon with MLX installed)")
         return "mlx"
-    else:
+    try:
+        import torch
+    except ImportError:
+        torch = None
+    if torch is not None and torch.cuda.is_available():
+        print(f"Backend: cuda ({torch.cuda.get_device_name()})")
         return "cuda"
+    print("Backend: cpu (no MLX on Apple Silicon and no CUDA device)")
+    return "cpu"
 
 
+@functools.cache
 def import_training_libs(backend: str):
-    """Import the right libraries based on backend."""
+    """Import the right libraries based on backend.
+
+    Only called from train(), so --stats and --auto runs with nothing to do
+    never load torch or MLX. Cached so repeated train() calls import once.
+    """
     if backend == "mlx":
         try:
             from unsloth_mlx import FastLanguageModel
@@ -79,69 +125,253 @@ exec(command: str, timeout: int = 30) - Execute a shell command
 list_tools() - List all available tools
 """.strip()
 
+# Sidecar holding line counts, written next to the counted files
+STATS_CACHE_NAME = ".stats_cache.json"
+_STATS_CACHE_LOCK = threading.Lock()
+# Sidecar entry for the cross-file unique-message count
+_UNIQUE_KEY = "*unique*"
+
+# Whitespace-only lines: after a newline (literal prefix, so re scans fast),
+# or at the very start of a buffer
+_BLANK_LINE = re.compile(rb"\n[ \t\r\f\v]*(?=\n)")
+_LEADING_BLANK = re.compile(rb"[ \t\r\f\v]*\n")
+
+# Files up to this size are read in one go; bigger ones are streamed in chunks
+_READ_ALL_MAX_SIZE = 64 << 20
+_CHUNK_SIZE = 1 << 20
+# Files at least this big are counted over an mmap with numpy, if installed
+_MMAP_MIN_SIZE = 256 << 20
+# Bytes compared per numpy pass, bounding the temporary arrays
+_MMAP_STEP = 1 << 24
+
+
+def count_lines(path: Path) -> int:
+    """Count non-blank lines in a JSONL file, cached on its mtime and size.
+
+    Counts are also kept in a ``.stats_cache.json`` sidecar next to the file so
+    later CLI runs skip the scan while the file is unchanged.
+    """
+    st = path.stat()
+    return _count_lines(str(path), st.st_mtime_ns, st.st_size)
+
+
+@functools.lru_cache(maxsize=32)
+def _count_lines(path: str, mtime_ns: int, size: int) -> int:
+    sidecar = os.path.join(os.path.dirname(path), STATS_CACHE_NAME)
+    name = os.path.basename(path)
+    hit = _read_stats_cache(sidecar).get(name)
+    if hit and hit.get("mtime_ns") == mtime_ns and hit.get("size") == size:
+        return hit["count"]
+
+    count = _scan_lines(path, size)
+    _update_stats_cache(sidecar, name, {"mtime_ns": mtime_ns, "size": size, "count": count})
+    return count
+
+
+def count_unique(paths: list) -> int:
+    """Count distinct user messages across JSONL files, as training dedups them.
+
+    Needs a full parse, so the result is kept in the stats sidecar keyed on
+    every file's mtime and size.
+    """
+    stamp = [[p.name, st.st_mtime_ns, st.st_size] for p in paths for st in [p.stat()]]
+    sidecar = os.path.join(os.path.dirname(paths[0]), STATS_CACHE_NAME) if paths else None
+    hit = _read_stats_cache(sidecar).get(_UNIQUE_KEY) if sidecar else None
+    if hit and hit.get("files") == stamp:
+        return hit["count"]
+
+    seen = set()
+    for path in paths:
+        for entry in iter_jsonl(path):
+            user_msg = entry.get("input", {}).get("user_message", "")
+            if user_msg:
+                seen.add(_message_key(user_msg))
+    if sidecar:
+        _update_stats_cache(sidecar, _UNIQUE_KEY, {"files": stamp, "count": len(seen)})
+    return len(seen)
+
+
+def _read_stats_cache(sidecar: str) -> dict:
+    try:
+        with open(sidecar, "rb") as f:
+            return json_loads(f.read())
+    except (OSError, ValueError):
+        return {}
+
+
+def _update_stats_cache(sidecar: str, key: str, entry: dict):
+    # Files are counted on worker threads; re-read under the lock so one
+    # thread's update doesn't drop another's
+    with _STATS_CACHE_LOCK:
+        cache = _read_stats_cache(sidecar)
+        cache[key] = entry
+        try:
+            # Write-then-rename so a concurrent reader never sees a partial file
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(sidecar), prefix=STATS_CACHE_NAME)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(json_dumps(cache))
+            os.replace(tmp, sidecar)
+        except OSError:
+            pass
+
+
+def _scan_lines(path: str, size: int) -> int:
+    if size >= _MMAP_MIN_SIZE:
+        try:
+            import numpy as np
+        except ImportError:
+            pass
+        else:
+            return _scan_lines_mmap(path, np)
+
+    # Unbuffered: reads are whole files or 1 MiB chunks, so skip the BufferedReader copy
+    with open(path, "rb", buffering=0) as f:
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        if size <= _READ_ALL_MAX_SIZE:
+            data = f.read()
+            return _count_buffer(data, data.count(b"\n"))
+
+        lines = blank = 0
+        tail = b""
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            chunk = tail + chunk
+            cut = chunk.rfind(b"\n") + 1
+            body, tail = chunk[:cut], chunk[cut:]
+            lines += body.count(b"\n")
+            blank += len(_BLANK_LINE.findall(body)) + bool(_LEADING_BLANK.match(body))
+        # Big files: don't let a count push the model's pages out of the cache.
+        # Small ones are left cached since the loaders usually read them next.
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+    return lines - blank + (1 if tail.strip() else 0)
+
+
+def _scan_lines_mmap(path: str, np) -> int:
+    # Only newline positions are materialized: a line whose first byte isn't
+    # whitespace is non-blank, and just the few that start with whitespace
+    # (indented or blank lines) are checked byte by byte
+    whitespace = np.zeros(256, dtype=bool)
+    whitespace[list(b" \t\n\r\v\f")] = True
+    count = start = 0
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        data = np.frombuffer(m, dtype=np.uint8)
+        for i in range(0, len(data), _MMAP_STEP):
+            ends = np.flatnonzero(data[i:i + _MMAP_STEP] == 0x0A)
+            if not len(ends):
+                continue
+            ends += i
+            last = int(ends[-1])
+            starts = np.empty_like(ends)
+            starts[0] = start
+            starts[1:] = ends[:-1] + 1
+            nonempty = starts < ends
+            starts, ends = starts[nonempty], ends[nonempty]
+            ws_first = whitespace[data[starts]]
+            count += len(starts) - int(np.count_nonzero(ws_first))
+            for s, e in zip(starts[ws_first].tolist(), ends[ws_first].tolist()):
+                count += bool(m[s:e].strip())
+            start = last + 1
+        del data  # release the buffer export so the map can close
+        return count + bool(m[start:].strip())
+
+
+def _count_buffer(buf, newlines: int) -> int:
+    """Non-blank lines in a whole file's bytes, given its newline count."""
+    blank = len(_BLANK_LINE.findall(buf)) + bool(_LEADING_BLANK.match(buf))
+    tail = buf[buf.rfind(b"\n") + 1:]
+    return newlines - blank + (1 if tail.strip() else 0)
+
+
+def iter_jsonl(path: Path) -> Iterator[dict]:
+    """Yield each JSON line of a file, skipping blank and malformed lines."""
+    with path.open("rb") as f:
+        for raw in f:
+            raw = raw.strip()
+            if not raw:
+                continue
+            try:
+                yield json_loads(raw)
+            except ValueError:
+                continue
+
+
+def _message_key(user_msg: str) -> bytes:
+    """Compact hash of a user message, used to spot duplicate examples."""
+    return hashlib.blake2b(user_msg.encode("utf-8"), digest_size=16).digest()
+
 
 def load_training_data() -> list:
-    """Load and format all training data for FunctionGemma fine-tuning."""
+    """Load and format all training data for FunctionGemma fine-tuning.
+
+    Examples are deduplicated on their user message; the first one seen wins.
+    """
     examples = []
+    seen: set = set()
 
     # Load from synthetic training file
     synthetic_path = DATA_DIR / "synthetic_training.jsonl"
     if synthetic_path.exists():
-        for line in synthetic_path.open():
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                entry = json.loads(line)
-                inp = entry.get("input", {})
-                out = entry.get("output", {})
+        for entry in iter_jsonl(synthetic_path):
+            inp = entry.get("input", {})
+            out = entry.get("output", {})
 
-                user_msg = inp.get("user_message", "")
-                tool_calls = out.get("tool_calls", [])
-
-                if not user_msg:
-                    continue
+            user_msg = inp.get("user_message", "")
+            tool_calls = out.get("tool_calls", [])
 
-                # Format the expected output
-                if tool_calls:
-                    output = json.dumps(tool_calls)
-                else:
-                    output = "[]"
+            if not user_msg:
+                continue
 
-                examples.append({
-                    "user_message": user_msg,
-                    "tool_calls": output,
-                })
-            except json.JSONDecodeError:
+            digest = _message_key(user_msg)
+            if digest in seen:
                 continue
+            seen.add(digest)
+
+            # Format the expected output
+            if tool_calls:
+                output = json.dumps(tool_calls)
+            else:
+                output = "[]"
+
+            examples.append({
+                "user_message": user_msg,
+                "tool_calls": output,
+            })
 
     # Also load from live routing decisions (if any)
     live_path = DATA_DIR / "training_data.jsonl"
     if live_path.exists():
-        for line in live_path.open():
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                entry = json.loads(line)
-                if entry.get("metadata", {}).get("success"):
-                    inp = entry.get("input", {})
-                    out = entry.get("output", {})
-                    user_msg = inp.get("user_message", "")
-                    tool_calls = out.get("tool_calls", [])
-
-                    if user_msg:
-                        examples.append({
-                            "user_message": user_msg,
-                            "tool_calls": json.dumps(tool_calls) if tool_calls else "[]",
-                        })
-            except json.JSONDecodeError:
-                continue
+        for entry in iter_jsonl(live_path):
+            if entry.get("metadata", {}).get("success"):
+                inp = entry.get("input", {})
+                out = entry.get("output", {})
+                user_msg = inp.get("user_message", "")
+                tool_calls = out.get("tool_calls", [])
+
+                digest = _message_key(user_msg)
+                if user_msg and digest not in seen:
+                    seen.add(digest)
+                    examples.append({
+                        "user_message": user_msg,
+                        "tool_calls": json.dumps(tool_calls) if tool_calls else "[]",
+                    })
 
-    print(f"Loaded {len(examples)} training examples")
+    print(f"Loaded {len(examples)} unique training examples")
     return examples
 
 
+# The chat template around each example, built once rather than per example
+_PREFIX = (
+    f"<start_of_turn>developer\n"
+    f"{SYSTEM_PROMPT}\n\n"
+    f"{TOOL_DEFINITIONS}\n"
+    f"<end_of_turn>\n"
+    f"<start_of_turn>user\n"
+)
+_MID = "\n<end_of_turn>\n<start_of_turn>model\n"
+_SUFFIX = "\n<end_of_turn>"
+
+
 def format_for_training(examples: list) -> list:
     """Format examples into the chat format FunctionGemma expects.
 
@@ -156,26 +386,10 @@ def format_for_training(examples: list) -> list:
     {tool calls as JSON}
     <end_of_turn>
     """
-    formatted = []
-
-    for ex in examples:
-        # Build the conversation in chat format
-        text = (
-            f"<start_of_turn>developer\n"
-            f"{SYSTEM_PROMPT}\n\n"
-            f"{TOOL_DEFINITIONS}\n"
-            f"<end_of_turn>\n"
-            f"<start_of_turn>user\n"
-            f"{ex['user_message']}\n"
-            f"<end_of_turn>\n"
-            f"<start_of_turn>model\n"
-            f"{ex['tool_calls']}\n"
-            f"<end_of_turn>"
-        )
-
-        formatted.append({"text": text})
-
-    return formatted
+    return [
+        {"text": _PREFIX + ex["user_message"] + _MID + ex["tool_calls"] + _SUFFIX}
+        for ex in examples
+    ]
 
 
 def format_as_instruction(examples: list) -> list:
@@ -200,6 +414,172 @@ def format_as_instruction(examples: list) -> list:
     return formatted
 
 
+def _dataset_cache_dir(format_style: str) -> Path:
+    """Cache location for a formatted dataset, keyed on the source files' stats."""
+    stats = []
+    for name in ["synthetic_training.jsonl", "training_data.jsonl"]:
+        path = DATA_DIR / name
+        st = path.stat() if path.exists() else None
+        stats.append(f"{st.st_mtime_ns}:{st.st_size}" if st else "-")
+    key = hashlib.blake2b(f"{stats[0]}|{stats[1]}|{format_style}".encode()).hexdigest()[:16]
+    return DATA_DIR / ".ds_cache" / key
+
+
+def _prune_cache_siblings(cache_dir: Path) -> None:
+    """Remove stale cache entries of the same kind (formatted or tokenized) as cache_dir."""
+    tokenized = cache_dir.name.startswith("tok-")
+    for entry in cache_dir.parent.iterdir():
+        if entry != cache_dir and entry.is_dir() and entry.name.startswith("tok-") == tokenized:
+            shutil.rmtree(entry, ignore_errors=True)
+
+
+def _require_examples(count: int, minimum: int = 10):
+    """Exit with a hint when there is too little data to train on."""
+    if count < minimum:
+        print(f"❌ Not enough training data ({count} examples). Need at least {minimum}.")
+        print(f"   Run experiments first to generate data.")
+        sys.exit(1)
+
+
+def build_dataset(format_style: str = "chat"):
+    """Load and format the training data as a Dataset, reusing the on-disk cache."""
+    from datasets import Dataset, load_from_disk
+
+    cache_dir = _dataset_cache_dir(format_style)
+    if cache_dir.exists():
+        dataset = load_from_disk(str(cache_dir))
+        print(f"Reusing {len(dataset)} formatted examples from {cache_dir}")
+        return dataset
+
+    examples = load_training_data()
+    _require_examples(len(examples))
+
+    if format_style == "chat":
+        formatted = format_for_training(examples)
+    else:
+        formatted = format_as_instruction(examples)
+
+    print(f"Formatted {len(formatted)} training examples ({format_style} style)")
+
+    dataset = Dataset.from_list(formatted)
+    dataset.save_to_disk(str(cache_dir))
+    _prune_cache_siblings(cache_dir)
+    return dataset
+
+
+def tokenize_dataset(dataset, tokenizer, base_model: str, max_seq_length: int):
+    """Tokenize a chat-format dataset once and cache the token ids on disk.
+
+    Keyed on the formatted data plus the tokenizer's model and max length, so
+    sweeps over epochs or learning rate reuse the same memory-mapped ids.
+    """
+    from datasets import load_from_disk
+
+    source = _dataset_cache_dir("chat").name
+    key = hashlib.blake2b(f"{source}|{base_model}|{max_seq_length}".encode()).hexdigest()[:16]
+    cache_dir = DATA_DIR / ".ds_cache" / f"tok-{key}"
+    if cache_dir.exists():
+        print(f"Reusing token ids from {cache_dir}")
+        return load_from_disk(str(cache_dir))
+
+    tokenized = dataset.map(
+        lambda batch: tokenizer(batch["text"], truncation=True, max_length=max_seq_length),
+        batched=True,
+        batch_size=1000,
+        remove_columns=dataset.column_names,
+    )
+    tokenized.save_to_disk(str(cache_dir))
+    _prune_cache_siblings(cache_dir)
+    return tokenized
+
+
+# LoRA ranks known to train well; below 4 underfits, above 128 costs more than it gains
+LORA_RANKS = (4, 8, 16, 32, 64, 128)
+
+# unsloth's 4-bit loading is always NF4 with double quant, computing in the
+# model's dtype, so the only real choice is the weight width
+QUANTIZE_CHOICES = ["nf4", "int8", "none"]
+
+
+def resolve_quantization(quantize: str, backend: str) -> str:
+    """The --quantize mode this machine can actually load."""
+    if quantize == "none":
+        return quantize
+    if backend == "mlx":
+        if quantize == "int8":
+            print("⚠️ int8 is not supported on MLX, using 4-bit")
+        return "nf4"
+    if importlib.util.find_spec("bitsandbytes") is None:
+        print(f"⚠️ bitsandbytes not installed, {quantize} needs it; falling back to unquantized LoRA")
+        return "none"
+    return quantize
+
+
+def quantization_kwargs(quantize: str) -> dict:
+    """from_pretrained() keyword arguments for a resolved quantization mode."""
+    if quantize == "int8":
+        return {"load_in_4bit": False, "load_in_8bit": True}
+    return {"load_in_4bit": quantize == "nf4"}
+
+
+def optimizer_name(paged: bool = False, bits: int = 32) -> str:
+    """HF TrainingArguments ``optim`` value for the requested AdamW variant.
+
+    With LoRA the optimizer state is small, so 8-bit moments save little; paging
+    is what matters, letting state spill to CPU instead of OOMing on long batches.
+    """
+    if paged:
+        return f"paged_adamw_{bits}bit"
+    return "adamw_8bit" if bits == 8 else "adamw_torch"
+
+
+# Chosen micro-batch sizes, keyed on model/precision/sequence length and GPU
+MICRO_BATCH_CACHE = OUTPUT_DIR / ".micro_batch.json"
+
+
+def longest_example_tokens(dataset, tokenizer, max_seq_length: int) -> int:
+    """Token length of the longest example (by characters), capped at max_seq_length."""
+    if "text" in dataset.column_names:
+        texts = dataset["text"]
+    else:
+        texts = ["\n".join(str(v) for v in row.values()) for row in dataset]
+    longest = max(texts, key=len)
+    return min(max_seq_length, len(tokenizer(longest)["input_ids"]))
+
+
+def find_micro_batch(model, seq_len: int, candidates=(1, 2, 4, 8, 16)) -> int:
+    """Largest candidate micro-batch whose forward+backward fits in GPU memory."""
+    import torch
+
+    best = candidates[0]
+    for size in candidates:
+        try:
+            ids = torch.zeros((size, seq_len), dtype=torch.long, device=model.device)
+            model(input_ids=ids, labels=ids).loss.backward()
+            best = size
+        except torch.cuda.OutOfMemoryError:
+            break
+        finally:
+            model.zero_grad(set_to_none=True)
+            torch.cuda.empty_cache()
+    return best
+
+
+def plan_batches(model, key: str, seq_len: int, target_tokens: int) -> tuple:
+    """Return (micro_batch, grad_accum) reaching about target_tokens per step."""
+    try:
+        cache = json.loads(MICRO_BATCH_CACHE.read_text())
+    except (OSError, ValueError):
+        cache = {}
+    micro = cache.get(key)
+    if micro is None:
+        micro = cache[key] = find_micro_batch(model, seq_len)
+        MICRO_BATCH_CACHE.parent.mkdir(parents=True, exist_ok=True)
+        MICRO_BATCH_CACHE.write_text(json.dumps(cache, indent=2))
+    accum = max(1, -(-target_tokens // (micro * seq_len)))
+    return micro, accum
+
+
 # ============================================================
 # Training
 # ============================================================
@@ -214,13 +594,29 @@ def train(
     lora_alpha: int = 32,
     output_dir: str = None,
     format_style: str = "chat",  # "chat" or "instruction"
+    save_formatted: bool = False,
+    quantize: str = "nf4",  # "nf4", "int8" or "none"
+    paged_optim: bool = False,
+    optim_bits: int = 32,
+    compile_mode: str = "none",  # "none" or a torch.compile mode
+    target_tokens: Optional[int] = None,  # tokens per optimizer step; overrides batch_size on CUDA
+    cache_tokens: bool = False,
 ):
     """Run the LoRA fine-tuning."""
 
     if backend == "auto":
         backend = get_backend()
+    if backend == "cpu":
+        print("❌ No training backend: install unsloth-mlx on Apple Silicon or run on a CUDA GPU.")
+        sys.exit(1)
+
+    # Line counts are an upper bound on examples and cost no parse, so too little
+    # data fails here rather than after the model has loaded
+    paths = [DATA_DIR / name for name in ["synthetic_training.jsonl", "training_data.jsonl"]]
+    _require_examples(sum(count_lines(p) for p in paths if p.exists()))
 
     FastLanguageModel, SFTTrainer, actual_backend = import_training_libs(backend)
+    quantize = resolve_quantization(quantize, actual_backend)
 
     output_dir = output_dir or str(OUTPUT_DIR / f"run-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
     os.makedirs(output_dir, exist_ok=True)
@@ -234,64 +630,78 @@ def train(
     print(f"  LR:         {learning_rate}")
     print(f"  Batch size: {batch_size}")
     print(f"  LoRA rank:  {lora_rank}")
+    print(f"  Quantize:   {quantize}")
     print(f"  Output:     {output_dir}")
     print(f"{'='*60}\n")
 
-    # Load data
-    examples = load_training_data()
-    if len(examples) < 10:
-        print(f"❌ Not enough training data ({len(examples)} examples). Need at least 10.")
-        print(f"   Run experiments first to generate data.")
-        sys.exit(1)
+    # Read the data on a worker thread while the base model loads
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        dataset_future = pool.submit(build_dataset, format_style)
 
-    # Format data
-    if format_style == "chat":
-        formatted = format_for_training(examples)
-    else:
-        formatted = format_as_instruction(examples)
-
-    print(f"Formatted {len(formatted)} training examples ({format_style} style)")
-
-    # Save formatted data for inspection
-    formatted_path = Path(output_dir) / "training_data.jsonl"
-    with open(formatted_path, "w") as f:
-        for item in formatted:
-            f.write(json.dumps(item) + "\n")
-    print(f"Saved formatted data to {formatted_path}")
-
-    # Load model + LoRA
-    print(f"\nLoading base model: {base_model}")
-    model, tokenizer = FastLanguageModel.from_pretrained(
-        model_name=base_model,
-        max_seq_length=max_seq_length,
-        load_in_4bit=True,
-    )
+        # Load model + LoRA
+        print(f"\nLoading base model: {base_model}")
+        model, tokenizer = FastLanguageModel.from_pretrained(
+            model_name=base_model,
+            max_seq_length=max_seq_length,
+            **quantization_kwargs(quantize),
+        )
 
-    # Add LoRA adapters
-    model = FastLanguageModel.get_peft_model(
-        model,
-        r=lora_rank,
-        lora_alpha=lora_alpha,
-        target_modules=[
-            "q_proj", "k_proj", "v_proj", "o_proj",
-            "gate_proj", "up_proj", "down_proj",
-        ],
-        lora_dropout=0.05,
-        bias="none",
-        use_gradient_checkpointing=True,
-    )
+        # Add LoRA adapters
+        model = FastLanguageModel.get_peft_model(
+            model,
+            r=lora_rank,
+            lora_alpha=lora_alpha,
+            target_modules=[
+                "q_proj", "k_proj", "v_proj", "o_proj",
+                "gate_proj", "up_proj", "down_proj",
+            ],
+            lora_dropout=0.05,
+            bias="none",
+            use_gradient_checkpointing=True,
+        )
 
-    # Create dataset
-    from datasets import Dataset
-    dataset = Dataset.from_list(formatted)
+        dataset = dataset_future.result()
+
+    if save_formatted:
+        formatted_path = Path(output_dir) / "training_data.jsonl"
+        dataset.to_json(str(formatted_path))
+        print(f"Saved formatted data to {formatted_path}")
+
+    grad_accum = 2
+    if target_tokens:
+        if actual_backend == "mlx":
+            print("⚠️ --target-tokens needs CUDA memory probing; using --batch-size on MLX")
+        else:
+            import torch
+            seq_len = longest_example_tokens(dataset, tokenizer, max_seq_length)
+            key = f"{base_model}|{quantize}|{lora_rank}|{seq_len}|{torch.cuda.get_device_name()}"
+            batch_size, grad_accum = plan_batches(model, key, seq_len, target_tokens)
+            print(f"Micro-batch {batch_size} x {grad_accum} accumulation steps "
+                  f"(~{batch_size * grad_accum * seq_len} tokens/step at {seq_len} tokens)")
 
     # Training arguments
     from transformers import TrainingArguments
+    extra_args = {}
+    if paged_optim or optim_bits != 32:
+        if actual_backend == "mlx":
+            print("⚠️ Paged/8-bit optimizers need bitsandbytes (CUDA); ignoring on MLX")
+        else:
+            extra_args["optim"] = optimizer_name(paged_optim, optim_bits)
+    if compile_mode != "none":
+        if actual_backend == "mlx":
+            print("⚠️ torch.compile does not apply to MLX; ignoring --compile")
+        else:
+            import torch
+            if tuple(int(p) for p in torch.__version__.split(".")[:2]) < (2, 1):
+                print(f"⚠️ torch.compile needs PyTorch 2.1+ (found {torch.__version__}); ignoring --compile")
+            else:
+                extra_args["torch_compile"] = True
+                extra_args["torch_compile_mode"] = compile_mode
     training_args = TrainingArguments(
         output_dir=output_dir,
         num_train_epochs=epochs,
         per_device_train_batch_size=batch_size,
-        gradient_accumulation_steps=2,
+        gradient_accumulation_steps=grad_accum,
         learning_rate=learning_rate,
         weight_decay=0.01,
         warmup_steps=10,
@@ -300,9 +710,20 @@ def train(
         save_total_limit=2,
         fp16=False if actual_backend == "mlx" else True,
         report_to="none",
+        **extra_args,
     )
 
     # Create trainer
+    dataset_kwargs = {}
+    if cache_tokens:
+        if actual_backend == "mlx":
+            print("⚠️ --cache-tokens needs TRL's skip_prepare_dataset (CUDA); ignoring on MLX")
+        elif format_style == "chat":
+            dataset = tokenize_dataset(dataset, tokenizer, base_model, max_seq_length)
+            dataset_kwargs["skip_prepare_dataset"] = True
+        else:
+            print("⚠️ --cache-tokens only applies to the chat format; tokenizing as usual")
+
     trainer = SFTTrainer(
         model=model,
         tokenizer=tokenizer,
@@ -310,10 +731,11 @@ def train(
         dataset_text_field="text" if format_style == "chat" else None,
         args=training_args,
         max_seq_length=max_seq_length,
+        **({"dataset_kwargs": dataset_kwargs} if dataset_kwargs else {}),
     )
 
     # Train!
-    print(f"\n🚀 Starting training ({len(formatted)} examples, {epochs} epochs)...")
+    print(f"\n🚀 Starting training ({len(dataset)} examples, {epochs} epochs)...")
     stats = trainer.train()
     print(f"\n✅ Training complete!")
     # unsloth-mlx returns a dict, unsloth returns TrainOutput
@@ -350,11 +772,21 @@ def train(
         "epochs": epochs,
         "learning_rate": learning_rate,
         "batch_size": batch_size,
+        "gradient_accumulation_steps": grad_accum,
         "lora_rank": lora_rank,
-        "training_examples": len(formatted),
+        "training_examples": len(dataset),
+        # Raw line count before dedup, so check_and_train can spot new data
+        "source_lines": sum(
+            count_lines(DATA_DIR / name)
+            for name in ["synthetic_training.jsonl", "training_data.jsonl"]
+            if (DATA_DIR / name).exists()
+        ),
         "final_loss": final_loss,
         "output_dir": str(output_dir),
         "format_style": format_style,
+        "quantize": quantize,
+        "optim": extra_args.get("optim", "default"),
+        "compile": extra_args.get("torch_compile_mode", "none"),
     }
     meta_path = Path(output_dir) / "training_meta.json"
     meta_path.write_text(json.dumps(meta, indent=2))
@@ -375,6 +807,10 @@ def train(
 # ============================================================
 # Automated pipeline
 # ============================================================
+# Newest data-file mtime_ns as of the last successful automatic training
+TRAIN_MARKER = DATA_DIR / ".last_train_marker"
+
+
 def check_and_train(min_examples: int = 100, force: bool = False):
     """Check if we have enough data and trigger training if so.
 
@@ -382,12 +818,23 @@ def check_and_train(min_examples: int = 100, force: bool = False):
     or heartbeat) to automatically retrain when enough new data
     accumulates.
     """
+    paths = [DATA_DIR / name for name in ["synthetic_training.jsonl", "training_data.jsonl"]]
+    existing = [p for p in paths if p.exists()]
+
+    # Nothing written since the last successful run: skip without counting
+    newest = max((p.stat().st_mtime_ns for p in existing), default=0)
+    if not force:
+        try:
+            last = int(TRAIN_MARKER.read_text())
+        except (OSError, ValueError):
+            last = None
+        if last is not None and newest <= last:
+            print("No training data changes since the last run.")
+            return None
+
     # Count available training data
-    total = 0
-    for path_name in ["synthetic_training.jsonl", "training_data.jsonl"]:
-        path = DATA_DIR / path_name
-        if path.exists():
-            total += sum(1 for line in path.open() if line.strip())
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        total = sum(pool.map(count_lines, existing))
 
     print(f"Available training data: {total} examples (need {min_examples})")
 
@@ -399,18 +846,96 @@ def check_and_train(min_examples: int = 100, force: bool = False):
     last_meta = OUTPUT_DIR / "latest" / "training_meta.json"
     if last_meta.exists() and not force:
         meta = json.loads(last_meta.read_text())
-        if meta.get("training_examples", 0) >= total:
+        if meta.get("source_lines", meta.get("training_examples", 0)) >= total:
             print(f"Already trained on {meta['training_examples']} examples. No new data.")
             return None
 
     print(f"🚀 Triggering training with {total} examples...")
-    return train()
+    meta = train()
+    if meta:
+        tmp = TRAIN_MARKER.with_suffix(".tmp")
+        tmp.write_text(str(newest))
+        os.replace(tmp, TRAIN_MARKER)
+    return meta
 
 
 # ============================================================
 # CLI
 # ============================================================
+def _count_in_background(path: Path) -> Future:
+    """Count a file's lines on a daemon thread, so Ctrl-C can exit without joining it."""
+    future = Future()
+
+    def run():
+        try:
+            future.set_result(count_lines(path))
+        except BaseException as e:  # noqa: BLE001 - re-raised by future.result()
+            future.set_exception(e)
+
+    threading.Thread(target=run, daemon=True).start()
+    return future
+
+
+def print_stats(min_examples: int = 100, unique: bool = False):
+    """Print example counts for each training data file as soon as each is known.
+
+    ``unique`` adds a count of distinct user messages, which needs a full parse.
+    Ctrl-C exits (status 130) after whatever counts have already been printed.
+    """
+    paths = [DATA_DIR / name for name in ["synthetic_training.jsonl", "training_data.jsonl"]]
+    existing = [p for p in paths if p.exists()]
+    try:
+        futures = {p: _count_in_background(p) for p in existing}
+        total = 0
+        for path in paths:
+            future = futures.get(path)
+            if future is None:
+                print(f"  {path.name}: (not found)", flush=True)
+                continue
+            line = f"  {path.name}: counting..."
+            if not future.done() and sys.stdout.isatty():
+                print(line, end="\r", flush=True)
+            count = future.result()
+            # ljust so the result fully covers a "counting..." placeholder
+            print(f"  {path.name}: {count} examples".ljust(len(line)), flush=True)
+            total += count
+        print(f"  Total: {total} examples", flush=True)
+        if unique and total:
+            distinct = count_unique(existing)
+            print(f"  Unique messages: {distinct} ({distinct / total:.0%})")
+            if distinct < 0.9 * total:
+                print(f"  ⚠️ {total - distinct} lines repeat an earlier user message or have none")
+    except KeyboardInterrupt:
+        print("\n(aborted)")
+        sys.exit(130)
+    print(f"  Ready for training: {'✅' if total >= min_examples else '❌'} (need {min_examples})")
+
+
+def _quick_stats_args(argv: list):
+    """Return --min-examples for a plain ``--stats`` call, or None to use argparse."""
+    rest = [a for a in argv if a != "--stats"]
+    if len(rest) == len(argv):
+        return None
+    if not rest:
+        return 100
+    if len(rest) == 1 and rest[0].startswith("--min-examples="):
+        value = rest[0].split("=", 1)[1]
+    elif len(rest) == 2 and rest[0] == "--min-examples":
+        value = rest[1]
+    else:
+        return None
+    return int(value) if value.isdigit() else None
+
+
 def main():
+    # --stats should feel instant, so answer it without building the parser
+    min_examples = _quick_stats_args(sys.argv[1:])
+    if min_examples is not None:
+        print_stats(min_examples)
+        return
+
+    import argparse
+
     parser = argparse.ArgumentParser(description="Train OpenHoof tool router")
     parser.add_argument("--backend", choices=["auto", "mlx", "cuda"], default="auto",
                         help="Training backend (auto-detects)")
@@ -419,31 +944,45 @@ def main():
     parser.add_argument("--epochs", type=int, default=3, help="Training epochs")
     parser.add_argument("--lr", type=float, default=2e-4, help="Learning rate")
     parser.add_argument("--batch-size", type=int, default=4, help="Batch size")
+    parser.add_argument("--target-tokens", type=int, default=None,
+                        help="Tokens per optimizer step; probes the largest micro-batch "
+                             "that fits and accumulates the rest (CUDA, replaces --batch-size)")
     parser.add_argument("--lora-rank", type=int, default=16, help="LoRA rank")
+    parser.add_argument("--quantize", choices=QUANTIZE_CHOICES, default="nf4",
+                        help="Base model weights: 4-bit NF4 (double-quantized), 8-bit, or unquantized")
+    parser.add_argument("--paged-optim", action="store_true",
+                        help="Use a paged AdamW that spills optimizer state to CPU under memory pressure")
+    parser.add_argument("--optim-bits", type=int, choices=[32, 8], default=32,
+                        help="AdamW optimizer state precision")
+    parser.add_argument("--compile", choices=["none", "default", "reduce-overhead", "max-autotune"],
+                        default="none", help="torch.compile mode for the model (CUDA only)")
     parser.add_argument("--format", choices=["chat", "instruction"], default="chat",
                         help="Training data format")
     parser.add_argument("--output", default=None, help="Output directory")
+    parser.add_argument("--cache-tokens", action="store_true",
+                        help="Tokenize once and reuse the cached token ids in later runs")
+    parser.add_argument("--save-formatted", action="store_true",
+                        help="Also write the formatted data as JSONL to the output directory")
     parser.add_argument("--auto", action="store_true",
                         help="Auto-mode: only train if enough new data")
     parser.add_argument("--min-examples", type=int, default=100,
                         help="Minimum examples for auto-training")
     parser.add_argument("--force", action="store_true", help="Force training")
     parser.add_argument("--stats", action="store_true", help="Show data stats and exit")
+    parser.add_argument("--unique", action="store_true",
+                        help="With --stats, also count distinct user messages (parses every line)")
 
     args = parser.parse_args()
 
+    if args.lora_rank > LORA_RANKS[-1]:
+        parser.error(f"--lora-rank {args.lora_rank} is above {LORA_RANKS[-1]}, which defeats LoRA's memory savings")
+    if args.lora_rank not in LORA_RANKS:
+        rank = min(LORA_RANKS, key=lambda r: abs(r - args.lora_rank))
+        print(f"⚠️ --lora-rank {args.lora_rank} is unusual; using {rank} (one of {', '.join(map(str, LORA_RANKS))})")
+        args.lora_rank = rank
+
     if args.stats:
-        total = 0
-        for path_name in ["synthetic_training.jsonl", "training_data.jsonl"]:
-            path = DATA_DIR / path_name
-            if path.exists():
-                count = sum(1 for line in path.open() if line.strip())
-                print(f"  {path_name}: {count} examples")
-                total += count
-            else:
-                print(f"  {path_name}: (not found)")
-        print(f"  Total: {total} examples")
-        print(f"  Ready for training: {'✅' if total >= args.min_examples else '❌'} (need {args.min_examples})")
+        print_stats(args.min_examples, unique=args.unique)
         return
 
     if args.auto:
@@ -458,6 +997,13 @@ def main():
             lora_rank=args.lora_rank,
             output_dir=args.output,
             format_style=args.format,
+            save_formatted=args.save_formatted,
+            quantize=args.quantize,
+            paged_optim=args.paged_optim,
+            optim_bits=args.optim_bits,
+            compile_mode=args.compile,
+            target_tokens=args.target_tokens,
+            cache_tokens=args.cache_tokens,
         )
 
 